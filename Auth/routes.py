@@ -1,10 +1,10 @@
-from flask import Blueprint, render_template, redirect, url_for, flash, request, session, make_response
+from flask import Blueprint, render_template, redirect, url_for, flash, request, session, make_response, current_app
 from flask_login import login_required, login_user, logout_user, current_user
 from flask_bcrypt import Bcrypt
 from Models.base_model import db, get_local_time
 from Models.users import Lawyers, Client
 from .form import RegistrationForm, LoginForm, ResetPasswordForm, ResetPasswordRequestForm
-from datetime import timedelta
+from Utils.token_store import token_store
 # from Utils.email import send_email
 # from Utils.notification_service import NotificationService
 import secrets, string
@@ -17,9 +17,6 @@ def generate_reset_token():
   alphabet = string.ascii_letters + string.digits
   return ''.join(secrets.choice(alphabet) for i in range(32))
 
-# Simple in-memory token storage (use Redis in production)
-password_reset_tokens = {}
-
 @auth_bp.route('/register', methods=['GET', 'POST'])
 def register():
   form = RegistrationForm()
@@ -110,10 +107,7 @@ def reset_password_request():
       if user:
         # Generate reset token (in production, use itsdangerous)
         token = generate_reset_token()
-        password_reset_tokens[token] = {
-          'user_id': user.id,
-          'expires': get_local_time() + timedelta(hours=1)
-        }
+        token_store().issue(token, {'user_id': user.id}, current_app.config["PASSWORD_RESET_TTL"])
         
         # In production: Send email with reset link
         reset_url = url_for('auth.reset_password', token=token, _external=True)
@@ -144,8 +138,8 @@ def reset_password(token):
   #   return redirect(url_for('dashboard.index'))
   
   # Validate token
-  token_data = password_reset_tokens.get(token)
-  if not token_data or token_data['expires'] < get_local_time():
+  token_data = token_store().get(token)
+  if not token_data:
     flash('Invalid or expired reset token.', 'error')
     return redirect(url_for('auth.reset_password_request'))
   
@@ -158,12 +152,14 @@ def reset_password(token):
   
   if form.validate_on_submit():
     try:
-      user.set_password(form.password.data)
+      # Redeem the token first so it cannot be used twice
+      if not token_store().pop(token):
+        flash('Invalid or expired reset token.', 'error')
+        return redirect(url_for('auth.reset_password_request'))
+
+      user.passwords = form.new_password.data
       db.session.commit()
       
-      # Remove used token
-      password_reset_tokens.pop(token, None)
-      
       flash('Your password has been reset successfully. Please log in.', 'success')
       return redirect(url_for('auth.login'))
         
@@ -2,7 +2,7 @@
 from flask_wtf import FlaskForm
 from wtforms import StringField, TextAreaField, SelectField, DateField, DecimalField
 from flask_wtf.file import MultipleFileField, FileAllowed
-from wtforms.validators import DataRequired, Length, Optional, NumberRange
+from wtforms.validators import DataRequired, Length, Optional, NumberRange, ValidationError
 from datetime import datetime
 
 class CaseForm(FlaskForm):
@@ -65,16 +65,21 @@ class PaymentForm(FlaskForm):
     NumberRange(min=1, message='Amount must be greater than 0')
   ])
   payment_method = SelectField('Payment Method', choices=[
-    ('Cash', 'Cash'),
-    ('Cheque', 'Check'),
-    ('Bank', 'Bank Transfer'),
-    ('Card', 'Card')
+    ('cash', 'Cash'),
+    ('cheque', 'Check'),
+    ('bank', 'Bank Transfer'),
+    ('card', 'Card')
   ], validators=[DataRequired()])
   reference = StringField('Reference/Check Number (Optional)', validators=[
     Optional(),
     Length(max=100)
   ])
 
+  def validate_amount(self, amount):
+    # Payments are stored in whole shillings; truncating would record less than was paid
+    if amount.data is not None and amount.data != amount.data.to_integral_value():
+      raise ValidationError("Amount must be a whole number of shillings")
+
 class EventForm(FlaskForm):
   title = StringField('Event Title', validators=[
       DataRequired(),
@@ -1,27 +1,99 @@
-from flask import Blueprint, render_template, redirect, url_for, flash, request, jsonify, session, make_response
+from flask import Blueprint, render_template, redirect, url_for, flash, request, jsonify, session, make_response, current_app
 from flask_login import login_required, current_user
 from Models.base_model import db, get_local_time
 from Models.users import Client, Lawyers
-from Models.case import Case, CaseNote, CaseFiles
-from Models.event import Event
-from Models.payment import Payment
+from Models.case import Case, CaseNote, CaseFiles, CaseStatus
+from Models.event import Event, EventType
+from Models.payment import Payment, PaymentType
+from Admin.routes import cache
 from .form import CaseForm, CaseNoteForm, PaymentForm, EventForm
-from sqlalchemy import or_, desc
-from datetime import date
+from .statements import request_statement
+from Utils.view_cache import cached_client_view, invalidate_client_views
+from Utils.replicas import replica_reads
+from sqlalchemy import desc, func
+from collections import defaultdict
+from datetime import date, datetime
 from slugify import slugify
 from decorator import role_required
-from .aws_credentials import awsCredentials
+from .storage import upload_files, discard_uploads, delete_objects, presign_upload, uploaded_size, file_extension, presigned_download_url, case_file_key, ALLOWED_UPLOAD_TYPES
 from botocore.exceptions import NoCredentialsError, PartialCredentialsError, ClientError
-import boto3
+from werkzeug.utils import secure_filename
+from itsdangerous import URLSafeTimedSerializer, BadData
+from functools import wraps
+import hashlib, time
 
 case_bp = Blueprint("case", __name__)
-s3 = boto3.resource(
-  "s3",
-  aws_access_key_id = awsCredentials.aws_access_key,
-  aws_secret_access_key = awsCredentials.aws_secret_key
-)
-bucket_name = awsCredentials.bucket_name
-region = awsCredentials.region
+
+@case_bp.app_template_global()
+def file_url(case_file, inline=False):
+  """Signed, cached download link for a case file"""
+  try:
+    return presigned_download_url(case_file.file_name, inline=inline)
+  except (NoCredentialsError, PartialCredentialsError) as e:
+    current_app.logger.error(f"Unable to sign download link for {case_file.file_name}: {e}")
+    return "#"
+
+# Writes that change a case's status drop the entry, but only in this worker's
+# cache when it is per process (SimpleCache), so other workers must expire theirs
+CASE_STATS_TIMEOUT = 60
+
+def case_stats_key(lawyer_id):
+  return f"case_stats:{lawyer_id}"
+
+def invalidate_case_stats(lawyer_id):
+  cache.delete(case_stats_key(lawyer_id))
+
+# Pages embed signed file links and CSRF tokens that expire, so a validator is
+# only honoured within the window it was issued in
+VALIDATOR_WINDOW = 10 * 60
+
+def case_page_etag(case_id, version):
+  parts = [
+    case_id, version, current_user.get_id(), get_local_time().date(),
+    int(time.time() // VALIDATOR_WINDOW), session.get("csrf_token"),
+  ]
+  return hashlib.sha1(":".join(map(str, parts)).encode("utf-8")).hexdigest()
+
+def conditional_case_view(owner_column):
+  """
+  Answer repeat requests for a case page with 304 after a single lookup of the case
+  version, which every note, payment, event and case write bumps. `owner_column`
+  scopes the lookup to the current user's cases the same way the view does.
+  """
+  def decorator(view):
+    @wraps(view)
+    def wrapper(case_id):
+      row = db.session.query(Case.version).filter(Case.alias == case_id, owner_column == current_user.id).first()
+      # Passed by keyword, as Flask passes view arguments
+      if row is None:
+        return view(case_id=case_id)
+
+      etag = case_page_etag(case_id, row.version)
+      # A 304 would hide pending flash messages
+      if request.if_none_match.contains(etag) and not session.get("_flashes"):
+        response = make_response("", 304)
+      else:
+        response = make_response(view(case_id=case_id))
+        if response.status_code != 200:
+          return response
+
+      response.set_etag(etag)
+      response.cache_control.private = True
+      response.cache_control.no_cache = True
+      return response
+    return wrapper
+  return decorator
+
+def case_files_by_note(case_id, include_internal=True):
+  """Load every file attached to a case's notes in one query, grouped by note id"""
+  query = CaseFiles.query.join(CaseNote, CaseFiles.case_note_id == CaseNote.id).filter(CaseNote.case_id == case_id)
+  if not include_internal:
+    query = query.filter(CaseNote.is_internal == False)
+
+  grouped = defaultdict(list)
+  for case_file in query.order_by(CaseFiles.id).all():
+    grouped[case_file.case_note_id].append(case_file)
+  return grouped
 
 @case_bp.route('/new-case/<int:client_id>', methods=['GET', 'POST'])
 @login_required
@@ -51,19 +123,11 @@ def add_case(client_id):
         lawyer_id=current_user.id
       )
       
+      # The "Case opened" timeline note is written in the same commit
       db.session.add(case)
       db.session.commit()
-      
-      # Add initial case note
-      if form.description.data:
-        initial_note = CaseNote(
-          case_id=case.id,
-          content="Case opened",
-          is_internal=False,
-          is_editable=False,
-        )
-        db.session.add(initial_note)
-        db.session.commit()
+      invalidate_case_stats(current_user.id)
+      invalidate_client_views(client.id)
       
       flash(f'Case "{case.title}" created successfully!', 'success')
       return redirect(url_for('case.case_detail', case_id=case.alias))
@@ -83,6 +147,8 @@ def add_case(client_id):
 
 @case_bp.route('/case-details/<string:case_id>')
 @login_required
+@replica_reads
+@conditional_case_view(Case.lawyer_id)
 def case_detail(case_id):
   """View case details with notes, payments, and events"""
   try:
@@ -101,8 +167,6 @@ def case_detail(case_id):
       Event.event_date >= date.today()
     ).order_by(Event.event_date, Event.event_time).limit(5).all()
     
-    # Calculate total payments
-    total_payments = sum(payment.amount for payment in payments)
     
     # Forms for adding new items
     note_form = CaseNoteForm()
@@ -112,11 +176,11 @@ def case_detail(case_id):
     context = {
       "case": case,
       "notes": notes,
-      "case_files": CaseFiles.query.all(),
+      "case_files": case_files_by_note(case.id),
       "client": client,
       "payments": payments,
       "upcoming_events": upcoming_events,
-      "total_payments": total_payments,
+      "total_payments": case.amount_paid,
       "note_form": note_form,
       "payment_form": payment_form,
       "event_form": event_form,
@@ -130,6 +194,9 @@ def case_detail(case_id):
 
 @case_bp.route('/client/case-details/<string:case_id>')
 @login_required
+@replica_reads
+@conditional_case_view(Case.client_id)
+@cached_client_view()
 def client_case_detail(case_id):
   """View case details with notes, payments, and events"""
   try:
@@ -147,17 +214,15 @@ def client_case_detail(case_id):
       Event.event_date >= date.today()
     ).order_by(Event.event_date, Event.event_time).limit(5).all()
     
-    # Calculate total payments
-    total_payments = sum(payment.amount for payment in payments)
 
     context = {
       "case": case,
       "notes": notes,
-      "case_files": CaseFiles.query.all(),
+      "case_files": case_files_by_note(case.id, include_internal=False),
       "lawyer": lawyer,
       "payments": payments,
       "upcoming_events": upcoming_events,
-      "total_payments": total_payments,
+      "total_payments": case.amount_paid,
     }
     
     return render_template('Client/case-detail.html', **context)
@@ -166,6 +231,37 @@ def client_case_detail(case_id):
     flash(f'Error: {str(e)}', 'danger')
     return redirect(request.referrer)
 
+@case_bp.route('/<int:case_id>/statement.pdf')
+@login_required
+def case_statement(case_id):
+  """Download a PDF statement of a case's payments and client-visible notes"""
+  case = Case.query.filter_by(unique_id=case_id).first()
+
+  if not case or not (
+    (current_user.role_name == "Lawyer" and case.lawyer_id == current_user.id) or
+    (current_user.role_name == "Client" and case.client_id == current_user.id)
+  ):
+    flash("Case not found", "danger")
+    return redirect(request.referrer or url_for('auth.login'))
+
+  try:
+    pdf = request_statement(case)
+  except Exception as e:
+    current_app.logger.error(f"Unable to prepare the statement of case {case.id}: {e}")
+    flash("Unable to prepare the case statement, please try again", "danger")
+    return redirect(request.referrer or url_for('auth.login'))
+
+  if pdf is None:
+    response = make_response("Preparing the case statement, this page will refresh shortly.", 202)
+    response.headers["Refresh"] = "2"
+    response.headers["Retry-After"] = "2"
+    return response
+
+  response = make_response(pdf)
+  response.headers["Content-Type"] = "application/pdf"
+  response.headers["Content-Disposition"] = f'attachment; filename="{case.alias}-statement.pdf"'
+  return response
+
 @case_bp.route('/new-note/<int:case_id>', methods=['POST'])
 @login_required
 def add_note(case_id):
@@ -191,6 +287,14 @@ def add_note(case_id):
         files = request.files.getlist("case_files")
         upload_file(note.id, files, case.id)
 
+      # Files the browser already sent straight to the bucket
+      upload_tokens = request.form.getlist("uploaded_files")
+      if upload_tokens:
+        recorded, rejected = record_uploaded_files(note, case, upload_tokens)
+        for name, reason in rejected.items():
+          flash(f"{name}: {reason}", "danger")
+
+      invalidate_client_views(case.client_id)
       flash('Note added successfully!', 'success')
       return redirect(url_for('case.case_detail', case_id=case.alias))
           
@@ -207,18 +311,18 @@ def add_note(case_id):
 def upload_file(note_id, files, case_id):
   case_note = CaseNote.query.get(note_id)
   case = Case.query.get(case_id)
+  uploads = {case_file_key(case.id, secure_filename(file.filename)): file for file in files if file.filename}
+  uploaded = []
   try:
-    for file in files:
-      filename = f"{case.alias}/{file.filename}"
-      filetype = file.filename.split(".")[-1]
-      case_files = CaseFiles(
+    uploaded = upload_files(uploads)
+    for filename in uploads:
+      db.session.add(CaseFiles(
         file_name = filename,
         case_note_id = case_note.id,
-        file_type = filetype
-      )
-      s3.Bucket(bucket_name).upload_fileobj(file, filename)
-      db.session.add(case_files)
-      db.session.commit()
+        file_type = filename.split(".")[-1]
+      ))
+    db.session.commit()
+    invalidate_client_views(case.client_id)
     flash("Files uploaded successfully", "success")
   except NoCredentialsError:
     db.session.rollback()
@@ -234,13 +338,142 @@ def upload_file(note_id, files, case_id):
     return redirect(url_for('case.case_detail', case_id=case.alias))
   except Exception as e:
     db.session.rollback()
+    discard_uploads(uploaded)
     flash(f"Error: {repr(e)}", "danger")
     return redirect(url_for('case.case_detail', case_id=case.alias))
 
-@login_required
-def remove_case_files(case_file):
-  s3.Bucket(bucket_name).Object(case_file.file_name).delete()
+# Long enough to upload within the presigned policy's expiry and then save the note
+UPLOAD_TOKEN_MAX_AGE = 60 * 60
+
+def upload_serializer():
+  return URLSafeTimedSerializer(current_app.secret_key, salt="case-upload")
+
+def record_uploaded_files(case_note, case, tokens):
+  """
+  Record CaseFiles rows for objects uploaded directly to the bucket, in one commit.
+  Only keys presign_uploads issued for this case are accepted, each through the
+  signed token it returned with the policy, and a key already on another note is refused.
+  Returns the recorded keys and a {file name: reason} mapping of the rejected ones.
+  """
+  max_size = current_app.config["MAX_UPLOAD_SIZE"]
+  keys, rejected = [], {}
+  for token in dict.fromkeys(tokens):
+    try:
+      upload = upload_serializer().loads(token, max_age=UPLOAD_TOKEN_MAX_AGE)
+    except BadData:
+      rejected["Upload"] = "Upload link is invalid or has expired"
+      continue
+    if upload.get("case") != case.id:
+      rejected[upload.get("key", "Upload").rsplit("/", 1)[-1]] = "Not a valid upload for this case"
+      continue
+    keys.append(upload["key"])
+
+  attached = dict(db.session.query(CaseFiles.file_name, CaseFiles.case_note_id).filter(CaseFiles.file_name.in_(keys)).all())
+  recorded = []
+
+  for key in keys:
+    name = key.rsplit("/", 1)[-1]
+    if attached.get(key) == case_note.id:
+      continue
+    if key in attached:
+      rejected[name] = "File is already attached to another note"
+      continue
+
+    size = uploaded_size(key)
+    if size is None:
+      rejected[name] = "File was not uploaded"
+      continue
+    if size > max_size:
+      discard_uploads([key])
+      rejected[name] = "File is too large"
+      continue
+
+    db.session.add(CaseFiles(
+      file_name = key,
+      case_note_id = case_note.id,
+      file_type = file_extension(key)
+    ))
+    recorded.append(key)
+
   db.session.commit()
+  invalidate_client_views(case.client_id)
+  return recorded, rejected
+
+@case_bp.route('/<int:case_id>/uploads/presign', methods=['POST'])
+@login_required
+@role_required(["Lawyer"])
+def presign_uploads(case_id):
+  """
+  Issue presigned POST policies so note attachments go straight to the bucket. Each
+  comes with a signed token binding its server-chosen key to the case, which the
+  note form sends back in place of the key.
+  """
+  case = Case.query.filter_by(unique_id=case_id, lawyer_id=current_user.id).first()
+  if not case:
+    return jsonify({"error": "Case not found"}), 404
+
+  max_size = current_app.config["MAX_UPLOAD_SIZE"]
+  file_name_length = CaseFiles.file_name.type.length
+  uploads, errors = [], {}
+
+  try:
+    for file in (request.get_json(silent=True) or {}).get("files", []):
+      name = str(file.get("name", ""))
+      filename = secure_filename(name)
+      key = case_file_key(case.id, filename)
+
+      if file_extension(filename) not in ALLOWED_UPLOAD_TYPES:
+        errors[name] = "File type not allowed"
+      elif not 0 < int(file.get("size") or 0) <= max_size:
+        errors[name] = f"Files must be between 1 byte and {max_size // (1024 * 1024)}MB"
+      elif len(key) > file_name_length:
+        errors[name] = "File name is too long"
+      else:
+        token = upload_serializer().dumps({"case": case.id, "key": key})
+        uploads.append({"name": name, "token": token, **presign_upload(key, max_size)})
+
+  except (NoCredentialsError, PartialCredentialsError):
+    return jsonify({"error": "Storage credentials not available"}), 503
+  except (TypeError, ValueError, AttributeError):
+    return jsonify({"error": "Invalid upload request"}), 400
+
+  return jsonify({"uploads": uploads, "errors": errors})
+
+@case_bp.route('/<int:case_id>/notes/<int:note_id>/files', methods=['POST'])
+@login_required
+@role_required(["Lawyer"])
+def finalize_uploads(case_id, note_id):
+  """Record files uploaded through presigned policies against a case note, given their upload tokens"""
+  case = Case.query.filter_by(unique_id=case_id, lawyer_id=current_user.id).first()
+  if not case:
+    return jsonify({"error": "Case not found"}), 404
+
+  case_note = CaseNote.query.filter_by(unique_id=note_id, case_id=case.id).first()
+  if not case_note:
+    return jsonify({"error": "Case note not found"}), 404
+
+  tokens = (request.get_json(silent=True) or {}).get("tokens", [])
+  if not isinstance(tokens, list) or not all(isinstance(token, str) for token in tokens):
+    return jsonify({"error": "Invalid upload tokens"}), 400
+
+  try:
+    recorded, rejected = record_uploaded_files(case_note, case, tokens)
+  except ClientError as e:
+    db.session.rollback()
+    return jsonify({"error": e.response['Error']['Message']}), 502
+
+  return jsonify({"recorded": recorded, "rejected": rejected})
+
+def remove_case_files(case_files):
+  """
+  Delete the objects behind `case_files` in bulk and their rows in the current
+  transaction. Rows whose object could not be deleted are kept; returns {key: error} for them.
+  """
+  failed = delete_objects([case_file.file_name for case_file in case_files])
+  for case_file in case_files:
+    if case_file.file_name not in failed:
+      db.session.delete(case_file)
+  return failed
 
 @case_bp.route('/<string:case_id>/<int:case_note_id>/edit', methods=['GET', 'POST'])
 @login_required
@@ -268,6 +501,7 @@ def edit_case_note(case_id, case_note_id):
       elif form.is_internal.data == "True":
          case_note.is_internal = True
       db.session.commit()
+      invalidate_client_views(case.client_id)
       
       flash('Case note updated successfully!', 'success')
       return redirect(url_for('case.case_detail', case_id=case.alias))
@@ -289,8 +523,8 @@ def edit_case_note(case_id, case_note_id):
 @case_bp.route('/remove-note/<int:note_id>/<string:case_id>')
 @login_required
 def remove_case_note(note_id, case_id):
-  """Add a note to a case"""
-  case = Case.query.filter_by(alias=case_id).first()
+  """Remove a note and its files from a case"""
+  case = Case.query.filter_by(alias=case_id, lawyer_id=current_user.id).first()
 
   if not case:
     flash("Case not found", "danger")
@@ -302,13 +536,21 @@ def remove_case_note(note_id, case_id):
     flash("Case note not found", "danger")
     return redirect(url_for('case.case_detail', case_id=case.alias))
   
-  case_files = CaseFiles.query.filter_by(case_note_id=case_note.id).all()
-  for case_file in case_files:
-    remove_case_files(case_file)
-      
   try:
+    case_files = CaseFiles.query.filter_by(case_note_id=case_note.id).all()
+    failed = remove_case_files(case_files)
+
+    if failed:
+      # Keep the note so the files that are still stored stay reachable
+      db.session.commit()
+      invalidate_client_views(case.client_id)
+      for key, error in failed.items():
+        flash(f'Could not delete {key}: {error}', 'danger')
+      return redirect(url_for('case.case_detail', case_id=case.alias))
+
     db.session.delete(case_note)
     db.session.commit()
+    invalidate_client_views(case.client_id)
     
     flash('Note removed successfully!', 'success')
     return redirect(url_for('case.case_detail', case_id=case.alias))
@@ -322,35 +564,34 @@ def remove_case_note(note_id, case_id):
 @login_required
 def add_payment(case_id):
   """Add a payment to a case"""
+  case = Case.query.filter_by(unique_id=case_id, lawyer_id=current_user.id).first()
+
+  if not case:
+    flash("Case not found", "danger")
+    return redirect(request.referrer or url_for('dashboard.index'))
+
   form = PaymentForm()
   
   if form.validate_on_submit():
     try:
-      case = Case.query.filter_by(unique_id=case_id, lawyer_id=current_user.id).first()
-
-      if not case:
-        flash("Case not found", "danger")
-        return redirect(request.referrer)
-    
+      # DecimalField data, stored in Integer columns (SQLite rejects Decimal outright);
+      # validate_amount has already refused fractional amounts
+      amount = int(form.amount.data)
       payment = Payment(
         case_id=case.id,
-        amount=form.amount.data,
-        payment_method=form.payment_method.data,
+        amount=amount,
+        # The column default is a datetime fixed when the model was imported
+        date_received=get_local_time().date(),
+        payment_method=PaymentType(form.payment_method.data),
         reference=form.reference.data.strip() if form.reference.data else None,
       )
       
+      # Payment, ledger update and timeline note commit together
       db.session.add(payment)
+      db.session.flush()
+      case.record_payment(payment)
       db.session.commit()
-      
-      # Add automatic note about payment
-      payment_note = CaseNote(
-        case_id=case.id,
-        content=f"Payment of Ksh{form.amount.data} received via {form.payment_method.data}",
-        is_internal=False,
-        is_editable=False,
-      )
-      db.session.add(payment_note)
-      db.session.commit()
+      invalidate_client_views(case.client_id)
       
       flash('Payment recorded successfully!', 'success')
 
@@ -368,48 +609,43 @@ def add_payment(case_id):
 @case_bp.route('/<int:case_id>/add_event', methods=['POST'])
 @login_required
 def add_event(case_id):
-    """Add an event to a case"""
+  """Add an event to a case"""
+  case = Case.query.filter_by(unique_id=case_id, lawyer_id=current_user.id).first()
+
+  if not case:
+    flash("Case not found", "danger")
+    return redirect(request.referrer or url_for('dashboard.index'))
+
+  form = EventForm()
+
+  if form.validate_on_submit():
     try:
-        case = Case.query.filter_by(
-            id=case_id,
-            user_id=current_user.id
-        ).first_or_404()
-        
-        form = EventForm()
-        
-        if form.validate_on_submit():
-            event = Event(
-                case_id=case_id,
-                title=form.title.data.strip(),
-                description=form.description.data.strip() if form.description.data else None,
-                event_date=form.event_date.data,
-                event_time=form.event_time.data if form.event_time.data else None,
-                event_type=form.event_type.data
-            )
-            
-            db.session.add(event)
-            db.session.commit()
-            
-            # Add automatic note about event
-            event_note = CaseNote(
-                case_id=case_id,
-                content=f"Event scheduled: {form.title.data} on {form.event_date.data}",
-                is_internal=False
-            )
-            db.session.add(event_note)
-            db.session.commit()
-            
-            flash('Event added successfully!', 'success')
-        else:
-            for field, errors in form.errors.items():
-                for error in errors:
-                    flash(f'{getattr(form, field).label.text}: {error}', 'error')
-            
+      event = Event(
+        case_id=case.id,
+        title=form.title.data.strip(),
+        description=form.description.data.strip() if form.description.data else None,
+        event_date=form.event_date.data,
+        event_time=datetime.strptime(form.event_time.data, "%H:%M").time() if form.event_time.data else None,
+        event_type=EventType(form.event_type.data)
+      )
+
+      # The event and its timeline note commit together
+      db.session.add(event)
+      db.session.commit()
+      invalidate_client_views(case.client_id)
+
+      flash('Event added successfully!', 'success')
+
     except Exception as e:
-        db.session.rollback()
-        flash('An error occurred while adding the event.', 'error')
-    
-    return redirect(url_for('cases.case_detail', case_id=case_id))
+      db.session.rollback()
+      flash(f'Error: {str(e)}', 'danger')
+
+  else:
+    for field, errors in form.errors.items():
+      for error in errors:
+        flash(f'{getattr(form, field).label.text}: {error}', 'danger')
+
+  return redirect(url_for('case.case_detail', case_id=case.alias))
 
 @case_bp.route('/<int:case_id>/edit', methods=['GET', 'POST'])
 @login_required
@@ -427,6 +663,8 @@ def edit_case(case_id):
     if form.validate_on_submit():
       form.populate_obj(case)
       db.session.commit()
+      invalidate_case_stats(current_user.id)
+      invalidate_client_views(case.client_id)
       
       flash('Case updated successfully!', 'success')
       return redirect(url_for('case.case_detail', case_id=case.alias))
@@ -454,8 +692,11 @@ def close_case(case_id):
       lawyer_id=current_user.id
     ).first()
     
-    case.status = "Closed"
+    case.status = CaseStatus.CLOSED
+    case.closed_date = get_local_time()
     db.session.commit()
+    invalidate_case_stats(current_user.id)
+    invalidate_client_views(case.client_id)
     
     flash(f'Case closed successfully.', 'success')
     return redirect(url_for('dashboard.index'))
@@ -498,12 +739,17 @@ def api_upcoming_events():
 def api_case_stats():
     """API endpoint for case statistics"""
     try:
-        stats = {
-            'total': Case.query.filter_by(user_id=current_user.id).count(),
-            'active': Case.query.filter_by(user_id=current_user.id, status='active').count(),
-            'pending': Case.query.filter_by(user_id=current_user.id, status='pending').count(),
-            'closed': Case.query.filter_by(user_id=current_user.id, status='closed').count()
-        }
+        key = case_stats_key(current_user.id)
+        stats = cache.get(key)
+
+        if stats is None:
+            counts = dict(db.session.query(Case.status, func.count(Case.id)).filter(
+                Case.lawyer_id == current_user.id
+            ).group_by(Case.status).all())
+
+            stats = {status.value: counts.get(status, 0) for status in CaseStatus}
+            stats['total'] = sum(counts.values())
+            cache.set(key, stats, timeout=CASE_STATS_TIMEOUT)
         
         return jsonify(stats)
         
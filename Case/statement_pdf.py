@@ -0,0 +1,72 @@
+from io import BytesIO
+from reportlab.lib import colors
+from reportlab.lib.pagesizes import A4
+from reportlab.lib.styles import getSampleStyleSheet
+from reportlab.lib.units import mm
+from reportlab.platypus import SimpleDocTemplate, Paragraph, Spacer, Table, TableStyle
+from xml.sax.saxutils import escape
+
+def _table(rows, widths):
+  table = Table(rows, colWidths=widths, repeatRows=1)
+  table.setStyle(TableStyle([
+    ("BACKGROUND", (0, 0), (-1, 0), colors.HexColor("#1f2937")),
+    ("TEXTCOLOR", (0, 0), (-1, 0), colors.white),
+    ("FONTNAME", (0, 0), (-1, 0), "Helvetica-Bold"),
+    ("FONTSIZE", (0, 0), (-1, -1), 9),
+    ("VALIGN", (0, 0), (-1, -1), "TOP"),
+    ("ROWBACKGROUNDS", (0, 1), (-1, -1), [colors.white, colors.HexColor("#f3f4f6")]),
+    ("GRID", (0, 0), (-1, -1), 0.25, colors.HexColor("#d1d5db")),
+  ]))
+  return table
+
+def render_statement(statement):
+  """
+  Render a case statement snapshot (plain dicts and strings, see
+  Case.statements.statement_snapshot) to PDF bytes. Runs in a worker process.
+  """
+  styles = getSampleStyleSheet()
+  buffer = BytesIO()
+  document = SimpleDocTemplate(
+    buffer, pagesize=A4, title=f"Statement - {statement['case']['title']}",
+    leftMargin=18 * mm, rightMargin=18 * mm, topMargin=18 * mm, bottomMargin=18 * mm,
+  )
+  case, client, lawyer = statement["case"], statement["client"], statement["lawyer"]
+  text = lambda value: Paragraph(escape(str(value or "")).replace("\n", "<br/>"), styles["BodyText"])
+
+  story = [
+    Paragraph(escape(case["title"]), styles["Title"]),
+    Paragraph(f"Case statement generated {statement['generated_at']}", styles["Normal"]),
+    Spacer(1, 6 * mm),
+    _table([
+      ["Case", "Client", "Lawyer"],
+      [
+        text(f"{case['case_number'] or case['alias']}\n{case['court_name'] or ''}\nStatus: {case['status']}"),
+        text(f"{client['name']}\n{client['email'] or ''}\n{client['phone'] or ''}"),
+        text(f"{lawyer['name']}\n{lawyer['email'] or ''}\n{lawyer['phone'] or ''}"),
+      ],
+    ], [58 * mm, 58 * mm, 58 * mm]),
+    Spacer(1, 8 * mm),
+    Paragraph("Payments", styles["Heading2"]),
+  ]
+
+  if statement["payments"]:
+    rows = [["Date", "Method", "Reference", "Amount"]]
+    rows += [
+      [payment["date"], payment["method"], text(payment["reference"]), f"Ksh {payment['amount']:,}"]
+      for payment in statement["payments"]
+    ]
+    rows.append(["", "", "Total", f"Ksh {statement['total_paid']:,}"])
+    story.append(_table(rows, [30 * mm, 30 * mm, 79 * mm, 35 * mm]))
+  else:
+    story.append(Paragraph("No payments recorded", styles["Normal"]))
+
+  story += [Spacer(1, 8 * mm), Paragraph("Case Notes", styles["Heading2"])]
+  if statement["notes"]:
+    rows = [["Date", "Note"]]
+    rows += [[note["date"], text(note["content"])] for note in statement["notes"]]
+    story.append(_table(rows, [40 * mm, 134 * mm]))
+  else:
+    story.append(Paragraph("No notes shared", styles["Normal"]))
+
+  document.build(story)
+  return buffer.getvalue()
@@ -0,0 +1,120 @@
+from flask import current_app
+from Admin.routes import cache
+from Models.base_model import get_local_time
+from Models.case import CaseNote
+from Models.payment import Payment
+from concurrent.futures import ProcessPoolExecutor
+from concurrent.futures.process import BrokenProcessPool
+from flask_caching.backends import NullCache
+import multiprocessing, threading
+
+STATEMENT_TIMEOUT = 7 * 24 * 60 * 60
+RENDER_TIMEOUT = 5 * 60
+
+_pool = None
+_pool_lock = threading.Lock()
+
+def statement_key(case):
+  """Statements are cached per case version, so any note or payment change starts a new entry"""
+  return f"statement:{case.id}:{case.version}"
+
+def statement_snapshot(case):
+  """Everything a statement shows, as plain values that can be sent to a worker process"""
+  client, lawyer = case.client, case.managing_lawyer
+  payments = Payment.query.filter_by(case_id=case.id).order_by(Payment.date_received, Payment.id).all()
+  notes = CaseNote.query.filter_by(case_id=case.id, is_internal=False).order_by(CaseNote.created_at, CaseNote.id).all()
+
+  return {
+    "generated_at": get_local_time().strftime("%b %d, %Y at %I:%M %p"),
+    "case": {
+      "title": case.title,
+      "alias": case.alias,
+      "case_number": case.case_number,
+      "court_name": case.court_name,
+      "status": case.status.value.title() if case.status else "",
+    },
+    "client": {"name": client.full_name, "email": client.email, "phone": client.phone},
+    "lawyer": {"name": lawyer.full_name, "email": lawyer.email, "phone": lawyer.phone},
+    "payments": [{
+      "date": payment.date_received.strftime("%b %d, %Y") if payment.date_received else "",
+      "method": payment.payment_method.value.title() if payment.payment_method else "",
+      "reference": payment.reference,
+      "amount": payment.amount,
+    } for payment in payments],
+    "total_paid": sum(payment.amount for payment in payments),
+    "notes": [{
+      "date": note.created_at.strftime("%b %d, %Y") if note.created_at else "",
+      "content": note.content,
+    } for note in notes],
+  }
+
+def _executor():
+  global _pool
+  with _pool_lock:
+    if _pool is None:
+      # spawn rather than fork: the web worker is threaded
+      _pool = ProcessPoolExecutor(
+        max_workers=current_app.config["STATEMENT_WORKERS"],
+        mp_context=multiprocessing.get_context("spawn"),
+      )
+    return _pool
+
+def _discard_pool(pool):
+  """Forget a pool that lost a worker so the next submit starts a new one; it has already stopped its workers"""
+  global _pool
+  with _pool_lock:
+    if _pool is pool:
+      _pool = None
+
+def _submit(snapshot):
+  from .statement_pdf import render_statement
+
+  pool = _executor()
+  try:
+    return pool, pool.submit(render_statement, snapshot)
+  except BrokenProcessPool:
+    _discard_pool(pool)
+    pool = _executor()
+    return pool, pool.submit(render_statement, snapshot)
+
+def request_statement(case):
+  """
+  PDF bytes of the case's statement at its current version, or None if it is not
+  ready yet. A miss queues one render in the worker pool; the rendering marker is
+  kept in the shared cache so concurrent requests from any web worker don't queue it again.
+  Without a cache to hold the result (NullCache) the statement is rendered in the request.
+  """
+  if isinstance(cache.cache, NullCache):
+    from .statement_pdf import render_statement
+    return render_statement(statement_snapshot(case))
+
+  key = statement_key(case)
+  pdf = cache.get(key)
+  if pdf is not None:
+    return pdf
+
+  if not cache.add(f"{key}:rendering", True, timeout=RENDER_TIMEOUT):
+    return None
+
+  try:
+    pool, future = _submit(statement_snapshot(case))
+  except Exception:
+    cache.delete(f"{key}:rendering")
+    raise
+
+  app = current_app._get_current_object()
+
+  def store(future):
+    with app.app_context():
+      try:
+        cache.set(key, future.result(), timeout=STATEMENT_TIMEOUT)
+      except BrokenProcessPool as e:
+        app.logger.error(f"Statement worker died rendering {key}: {e}")
+        _discard_pool(pool)
+      except Exception as e:
+        app.logger.error(f"Unable to render statement {key}: {e}")
+      finally:
+        cache.delete(f"{key}:rendering")
+
+  future.add_done_callback(store)
+  return None
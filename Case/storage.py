@@ -0,0 +1,204 @@
+from .aws_credentials import awsCredentials
+from botocore.exceptions import ClientError
+from concurrent.futures import ThreadPoolExecutor, as_completed
+from Utils.lru_cache import LRUCache
+import logging, posixpath, threading, uuid
+
+MB = 1024 * 1024
+UPLOAD_WORKERS = 8
+# Upper limit of keys per DeleteObjects request
+DELETE_BATCH_SIZE = 1000
+PRESIGNED_UPLOAD_EXPIRY = 10 * 60
+DOWNLOAD_URL_EXPIRY = 60 * 60
+# Signed links are reused for three quarters of their lifetime, so a served page
+# always has at least 15 minutes before its links expire
+DOWNLOAD_URL_REUSE = 45 * 60
+
+# Extensions accepted by CaseNoteForm.case_files and the content type each is stored with
+ALLOWED_UPLOAD_TYPES = {
+  "jpg": "image/jpeg",
+  "jpeg": "image/jpeg",
+  "png": "image/png",
+  "pdf": "application/pdf",
+  "xlsx": "application/vnd.openxmlformats-officedocument.spreadsheetml.sheet",
+  "docx": "application/vnd.openxmlformats-officedocument.wordprocessingml.document",
+}
+
+bucket_name = awsCredentials.bucket_name
+region = awsCredentials.region
+logger = logging.getLogger(__name__)
+download_urls = LRUCache(maxsize=10000, ttl=DOWNLOAD_URL_REUSE)
+
+class Storage:
+  """
+  S3 access of the app. boto3 is imported and the client built on first use, not
+  when a worker boots; the lock makes sure concurrent first requests share one
+  client, which is thread-safe once built (boto3's default session is not).
+  """
+  def __init__(self, app=None):
+    self._client = None
+    self._transfer_config = None
+    self._lock = threading.Lock()
+    if app is not None:
+      self.init_app(app)
+
+  def init_app(self, app):
+    app.extensions["storage"] = self
+
+  def _built(self):
+    if self._client is None:
+      with self._lock:
+        if self._client is None:
+          import boto3
+          from boto3.s3.transfer import TransferConfig
+          from botocore.config import Config
+
+          session = boto3.session.Session(
+            aws_access_key_id = awsCredentials.aws_access_key,
+            aws_secret_access_key = awsCredentials.aws_secret_key
+          )
+          # Files above the threshold are sent as parallel multipart chunks
+          self._transfer_config = TransferConfig(
+            multipart_threshold=8 * MB,
+            multipart_chunksize=8 * MB,
+            max_concurrency=4,
+            use_threads=True,
+          )
+          # The bucket's region, SigV4 and its regional endpoint explicitly: otherwise the
+          # client falls back to us-east-1 and legacy signatures, which regions such as
+          # eu-north-1 reject, and signed links would point at the global endpoint
+          self._client = session.client("s3", region_name=region, config=Config(signature_version="s3v4", s3={"addressing_style": "virtual"}))
+    return self._client, self._transfer_config
+
+  @property
+  def client(self):
+    return self._built()[0]
+
+  @property
+  def transfer_config(self):
+    return self._built()[1]
+
+storage = Storage()
+
+def upload_files(uploads):
+  """
+  Upload a {key: file object} mapping to the bucket concurrently through a bounded pool.
+  Either every file is stored or, on the first failure, the ones that made it are
+  removed again and the error is re-raised.
+  """
+  if not uploads:
+    return []
+
+  client = storage.client
+  uploaded, errors = [], []
+
+  with ThreadPoolExecutor(max_workers=min(UPLOAD_WORKERS, len(uploads))) as pool:
+    futures = {
+      pool.submit(client.upload_fileobj, file, bucket_name, key, Config=storage.transfer_config): key
+      for key, file in uploads.items()
+    }
+    for future in as_completed(futures):
+      try:
+        future.result()
+        uploaded.append(futures[future])
+      except Exception as e:
+        errors.append(e)
+
+  if errors:
+    discard_uploads(uploaded)
+    raise errors[0]
+  return uploaded
+
+def delete_objects(keys):
+  """
+  Delete keys with the bulk DeleteObjects API, up to 1000 per request.
+  Returns a {key: error message} mapping for the keys that could not be deleted.
+  """
+  client = storage.client
+  keys = list(dict.fromkeys(keys))
+  failed = {}
+
+  for start in range(0, len(keys), DELETE_BATCH_SIZE):
+    batch = keys[start:start + DELETE_BATCH_SIZE]
+    try:
+      response = client.delete_objects(
+        Bucket=bucket_name,
+        Delete={"Objects": [{"Key": key} for key in batch], "Quiet": True}
+      )
+    except ClientError as e:
+      failed.update({key: e.response["Error"]["Message"] for key in batch})
+      continue
+    for error in response.get("Errors", []):
+      failed[error["Key"]] = error.get("Message") or error.get("Code")
+
+  return failed
+
+def discard_uploads(keys):
+  """Best-effort removal of objects written by a failed upload"""
+  if not keys:
+    return
+  try:
+    failed = delete_objects(keys)
+  except Exception as e:
+    failed = {key: str(e) for key in keys}
+  if failed:
+    logger.warning(f"Could not remove partial uploads: {failed}")
+
+def case_file_key(case_id, filename):
+  """
+  Bucket key for a new upload to a case. Keys live under the case's id and a random
+  component, so they cannot be guessed and cases never share or overwrite each other's files.
+  """
+  return f"cases/{case_id}/{uuid.uuid4().hex}/{filename}"
+
+def file_extension(filename):
+  return filename.rsplit(".", 1)[-1].lower() if "." in filename else ""
+
+def presign_upload(key, max_size):
+  """
+  Presigned POST policy letting the browser upload `key` straight to the bucket.
+  The policy pins the key, its content type and a size range, and is signed with
+  SigV4 for the bucket's region (the x-amz-* fields), so `url` is the regional
+  endpoint. The bucket needs a CORS rule allowing POST from the app's origin.
+  """
+  content_type = ALLOWED_UPLOAD_TYPES[file_extension(key)]
+  return storage.client.generate_presigned_post(
+    Bucket=bucket_name,
+    Key=key,
+    Fields={"Content-Type": content_type},
+    Conditions=[
+      {"Content-Type": content_type},
+      ["content-length-range", 1, max_size],
+    ],
+    ExpiresIn=PRESIGNED_UPLOAD_EXPIRY,
+  )
+
+def uploaded_size(key):
+  """Size of an object in the bucket, or None if it was never uploaded"""
+  try:
+    return storage.client.head_object(Bucket=bucket_name, Key=key)["ContentLength"]
+  except ClientError as e:
+    if e.response["Error"]["Code"] in ("404", "NoSuchKey", "NotFound"):
+      return None
+    raise
+
+def presigned_download_url(key, inline=False):
+  """
+  Short-lived signed GET link for a private object, memoized per key. S3 honours
+  Range headers on signed links, so PDF viewers can fetch large files in parts.
+  """
+  cache_key = (key, inline)
+  url = download_urls.get(cache_key)
+  if url is None:
+    disposition = "inline" if inline else "attachment"
+    url = storage.client.generate_presigned_url(
+      "get_object",
+      Params={
+        "Bucket": bucket_name,
+        "Key": key,
+        "ResponseContentDisposition": f'{disposition}; filename="{posixpath.basename(key)}"',
+      },
+      ExpiresIn=DOWNLOAD_URL_EXPIRY,
+    )
+    download_urls.set(cache_key, url)
+  return url
@@ -1,5 +1,6 @@
 # clients/forms.py
 from flask_wtf import FlaskForm
+from flask_wtf.file import FileField, FileRequired, FileAllowed
 from wtforms import StringField, TextAreaField, TelField, EmailField, SelectField
 from wtforms.validators import DataRequired, Email, Length, Optional
 from Models.users import Client
@@ -30,3 +31,9 @@ class ClientForm(FlaskForm):
     ('Business', 'Business'),
     ('Organization', 'Organization')
   ], default='individual')
+
+class ClientImportForm(FlaskForm):
+  file = FileField('Client List (CSV or XLSX)', validators=[
+    FileRequired(),
+    FileAllowed(['csv', 'xlsx'], 'CSV or XLSX files only!')
+  ])
@@ -0,0 +1,97 @@
+from Models.base_model import db
+from Models.users import Client
+from Models.unique_id import allocate_unique_ids
+from Utils.hashing import hash_passwords
+from sqlalchemy import insert
+
+COLUMNS = ["first_name", "last_name", "email", "phone", "address", "client_type"]
+REQUIRED_COLUMNS = {"first_name", "last_name", "email", "phone"}
+CLIENT_TYPES = ["Individual", "Business", "Organization"]
+EMAIL_PATTERN = r"[^@\s]+@[^@\s]+\.[^@\s]+"
+PHONE_PATTERN = r"0[17]\d{8}"
+IN_CHUNK_SIZE = 1000
+
+def read_clients(stream, filename):
+  """
+  Parse an uploaded CSV or XLSX sheet into a frame of stripped strings indexed by
+  spreadsheet row number (the header is row 1). Raises ValueError for unusable files.
+  """
+  # pandas takes a good part of a second to import, only pay for it on an import
+  import pandas as pd
+
+  extension = filename.rsplit(".", 1)[-1].lower() if "." in filename else ""
+  if extension == "csv":
+    frame = pd.read_csv(stream, dtype=str, keep_default_na=False)
+  elif extension == "xlsx":
+    frame = pd.read_excel(stream, dtype=str, keep_default_na=False)
+  else:
+    raise ValueError("Only CSV and XLSX files can be imported")
+
+  frame.columns = frame.columns.astype(str).str.strip().str.lower().str.replace(r"[\s-]+", "_", regex=True)
+  missing = REQUIRED_COLUMNS - set(frame.columns)
+  if missing:
+    raise ValueError(f"Missing column(s): {', '.join(sorted(missing))}")
+
+  for column in COLUMNS:
+    if column not in frame:
+      frame[column] = ""
+  frame = frame[COLUMNS].fillna("").astype(str).apply(lambda column: column.str.strip())
+  frame["email"] = frame["email"].str.lower()
+  frame["client_type"] = frame["client_type"].str.title().replace("", "Individual")
+  frame.index = frame.index + 2
+  return frame
+
+def existing_values(column, values):
+  """Values of `column` already stored, looked up in chunks of IN_CHUNK_SIZE"""
+  values = [value for value in values.unique() if value]
+  found = set()
+  for start in range(0, len(values), IN_CHUNK_SIZE):
+    chunk = values[start:start + IN_CHUNK_SIZE]
+    found.update(value for (value,) in db.session.query(column).filter(column.in_(chunk)))
+  return found
+
+def validate_clients(frame):
+  """Split a frame into importable rows and a {row number: [errors]} report"""
+  import pandas as pd
+
+  checks = pd.DataFrame({
+    "First name is required": frame.first_name.eq(""),
+    "First name must be at most 50 characters": frame.first_name.str.len() > 50,
+    "Last name is required": frame.last_name.eq(""),
+    "Last name must be at most 50 characters": frame.last_name.str.len() > 50,
+    "Email address is required": frame.email.eq(""),
+    "Invalid email address": frame.email.ne("") & ~frame.email.str.fullmatch(EMAIL_PATTERN),
+    "Phone number must be 10 digits starting with 07 or 01": ~frame.phone.str.fullmatch(PHONE_PATTERN),
+    "Client type must be one of " + ", ".join(CLIENT_TYPES): ~frame.client_type.isin(CLIENT_TYPES),
+    "Email address appears earlier in the file": frame.email.ne("") & frame.email.duplicated(),
+    "Phone number appears earlier in the file": frame.phone.ne("") & frame.phone.duplicated(),
+    "Email address already registered": frame.email.isin(existing_values(Client.email, frame.email)),
+    "Phone number already registered": frame.phone.isin(existing_values(Client.phone, frame.phone)),
+  }, index=frame.index)
+
+  invalid = checks.any(axis=1)
+  errors = {
+    int(row): list(checks.columns[failed.to_numpy()])
+    for row, failed in checks[invalid].iterrows()
+  }
+  return frame[~invalid], errors
+
+def import_clients(frame, lawyer_id, rounds=12):
+  """
+  Validate and insert clients for a lawyer in one transaction. As with add_client
+  the phone number is the initial password. Returns (imported count, error report).
+  """
+  valid, errors = validate_clients(frame)
+  if valid.empty:
+    return 0, errors
+
+  rows = valid.assign(
+    lawyer_id=lawyer_id,
+    address=valid.address.replace("", None),
+    password=hash_passwords(valid.phone.tolist(), rounds),
+    unique_id=allocate_unique_ids(Client, len(valid)),
+  ).to_dict("records")
+
+  db.session.execute(insert(Client), rows)
+  db.session.commit()
+  return len(rows), errors
@@ -1,11 +1,16 @@
-from flask import Blueprint, render_template, redirect, url_for, flash, request, jsonify, session, make_response
+from flask import Blueprint, render_template, redirect, url_for, flash, request, jsonify, session, make_response, current_app
 from flask_login import login_required, current_user
 from Models.base_model import db, get_local_time
-from Models.users import Client
+from Models.users import Client, Lawyers
 from Models.case import Case
 from Models.payment import Payment
 from sqlalchemy import or_
-from .form import ClientForm
+from .form import ClientForm, ClientImportForm
+from .search import search_clients
+from .importer import read_clients, import_clients
+from Utils.view_cache import invalidate_client_views
+from Utils.replicas import replica_reads
+import click
 from decorator import role_required
 
 client_bp = Blueprint("client", __name__)
@@ -56,8 +61,64 @@ def add_client():
 
   return render_template('Main/add-client.html', **context)
 
+@client_bp.route('/clients/import', methods=['GET', 'POST'])
+@login_required
+@role_required(["Lawyer"])
+def import_client_list():
+  """Bulk-import clients from a CSV or XLSX sheet"""
+  form = ClientImportForm()
+  report = None
+
+  if form.validate_on_submit():
+    try:
+      frame = read_clients(form.file.data.stream, form.file.data.filename)
+      imported, errors = import_clients(frame, current_user.id, current_app.config.get("BCRYPT_LOG_ROUNDS", 12))
+      report = {
+        "imported": imported,
+        "errors": [{"row": row, "errors": messages} for row, messages in sorted(errors.items())],
+      }
+      flash(f'{imported} client(s) imported, {len(errors)} row(s) rejected', 'success' if imported else 'warning')
+
+    except ValueError as e:
+      flash(str(e), 'danger')
+    except Exception as e:
+      db.session.rollback()
+      flash(f'Error: {str(e)}', 'danger')
+
+  if report and request.accept_mimetypes.best == "application/json":
+    return jsonify(report)
+
+  context = {
+    "form": form,
+    "report": report,
+    "back_url": url_for('dashboard.index'),
+  }
+
+  return render_template('Main/import-clients.html', **context)
+
+@client_bp.cli.command("import")
+@click.argument("path", type=click.Path(exists=True, dir_okay=False))
+@click.option("--lawyer", "lawyer_email", required=True, help="Email address of the lawyer the clients belong to")
+def import_clients_command(path, lawyer_email):
+  """Bulk-import clients from a CSV or XLSX file"""
+  lawyer = Lawyers.query.filter_by(email=lawyer_email.lower().strip()).first()
+  if not lawyer:
+    raise click.ClickException(f"No lawyer with the email {lawyer_email}")
+
+  try:
+    with open(path, "rb") as stream:
+      frame = read_clients(stream, path)
+  except ValueError as e:
+    raise click.ClickException(str(e))
+
+  imported, errors = import_clients(frame, lawyer.id, current_app.config.get("BCRYPT_LOG_ROUNDS", 12))
+  for row, messages in sorted(errors.items()):
+    click.echo(f"Row {row}: {'; '.join(messages)}")
+  click.echo(f"{imported} client(s) imported, {len(errors)} row(s) rejected")
+
 @client_bp.route('/client/profile/<int:client_id>')
 @login_required
+@replica_reads
 def client_profile(client_id):
   """View client details and their cases"""
   try:
@@ -103,6 +164,7 @@ def edit_client(client_id):
       # Update client information
       form.populate_obj(client)
       db.session.commit()
+      invalidate_client_views(client.id)
       
       flash(f'Client {client.full_name} updated successfully!', 'success')
       return redirect(url_for('client.client_profile', client_id=client.unique_id))
@@ -159,13 +221,7 @@ def api_search():
         if not query or len(query) < 2:
             return jsonify([])
         
-        clients = Client.query.filter_by(user_id=current_user.id).filter(
-            or_(
-                Client.first_name.ilike(f'%{query}%'),
-                Client.last_name.ilike(f'%{query}%'),
-                Client.email.ilike(f'%{query}%')
-            )
-        ).limit(10).all()
+        clients = search_clients(current_user.id, query, limit=10)
         
         results = [{
             'id': client.id,
@@ -0,0 +1,35 @@
+from Models.base_model import db
+from Models.users import Client, client_search_document
+from sqlalchemy import or_, case, text
+
+# Trigram indexes need at least three characters to narrow the search
+MIN_INDEXED_LENGTH = 3
+
+def prefix_rank(term):
+  """0 for clients with a field starting with the term, 1 otherwise"""
+  return case((or_(
+    Client.first_name.istartswith(term, autoescape=True),
+    Client.last_name.istartswith(term, autoescape=True),
+    Client.email.istartswith(term, autoescape=True),
+    Client.phone.startswith(term, autoescape=True),
+  ), 0), else_=1)
+
+def indexed_match(term):
+  """Substring predicate served by pg_trgm on PostgreSQL and the clients_fts table on SQLite"""
+  if db.session.get_bind().dialect.name == "sqlite":
+    phrase = '"' + term.replace('"', '""') + '"'
+    return Client.id.in_(text("SELECT rowid FROM clients_fts WHERE clients_fts MATCH :phrase").bindparams(phrase=phrase))
+  escaped = term.lower().replace("/", "//").replace("%", "/%").replace("_", "/_")
+  return client_search_document().like(f"%{escaped}%", escape="/")
+
+def search_clients(lawyer_id, term, limit=10):
+  """A lawyer's clients whose name, email or phone contains `term`, prefix matches first"""
+  term = term.strip()
+  query = Client.query.filter(Client.lawyer_id == lawyer_id)
+
+  if len(term) >= MIN_INDEXED_LENGTH:
+    query = query.filter(indexed_match(term))
+  else:
+    query = query.filter(prefix_rank(term) == 0)
+
+  return query.order_by(prefix_rank(term), Client.last_name, Client.first_name).limit(limit).all()
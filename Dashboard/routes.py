@@ -1,32 +1,240 @@
-from flask import Blueprint, render_template, redirect, url_for, flash, request, jsonify, session, make_response
+from flask import Blueprint, render_template, redirect, url_for, flash, request, jsonify, session, make_response, abort, Response, current_app, stream_with_context
 from flask_login import current_user, login_required
 from Models.users import Client, Lawyers
-from Models.case import Case, CaseNote
+from Models.case import Case, CaseNote, CaseStatus
 from Models.payment import Payment
 from Models.event import Event
+from Utils.pagination import keyset_page, DEFAULT_PAGE_SIZE
+from Utils.export import stream_csv, stream_xlsx
+from Utils.ical import generate_calendar
+from Utils.user_cache import load_user_cached
+from Utils.view_cache import cached_client_view
+from Utils.replicas import replica_reads
+from Models.base_model import db, get_local_time
+from sqlalchemy import func, select
+from sqlalchemy.orm import joinedload
+from datetime import date, datetime, time
 from decorator import role_required
+from itsdangerous import URLSafeSerializer, BadSignature
+from werkzeug.http import is_resource_modified, quote_etag
+import hashlib
 
 dashboard_bp = Blueprint("dashboard", __name__)
 
+def client_page(cursor=None, limit=DEFAULT_PAGE_SIZE):
+  query = Client.query.filter_by(lawyer_id=current_user.id)
+  return keyset_page(query, Client.created_at, Client.id, cursor, limit)
+
+def case_page(cursor=None, limit=DEFAULT_PAGE_SIZE):
+  query = Case.query.filter_by(lawyer_id=current_user.id).options(joinedload(Case.client))
+  return keyset_page(query, Case.opened_date, Case.id, cursor, limit)
+
 @dashboard_bp.route("/")
 @dashboard_bp.route("/home")
 @role_required(["Lawyer"])
 @login_required
+@replica_reads
 def index():
+  clients, clients_cursor = client_page()
+  cases, cases_cursor = case_page()
+  revenue, payment_count = db.session.query(
+    func.coalesce(func.sum(Case.amount_paid), 0),
+    func.coalesce(func.sum(Case.payment_count), 0)
+  ).filter(Case.lawyer_id == current_user.id).one()
+
   context = {
-    "clients": Client.query.filter_by(lawyer_id=current_user.id).all(),
-    "cases": Case.query.filter_by(lawyer_id=current_user.id).all(),
+    "clients": clients,
+    "clients_cursor": clients_cursor,
+    "client_count": Client.query.filter_by(lawyer_id=current_user.id).count(),
+    "cases": cases,
+    "cases_cursor": cases_cursor,
+    "case_count": Case.query.filter_by(lawyer_id=current_user.id).count(),
+    "revenue": revenue,
+    "payment_count": payment_count,
+    "calendar_url": calendar_feed_url(current_user),
   }
 
   return render_template("Main/index.html", **context)
 
+@dashboard_bp.route("/api/dashboard/<string:tab>")
+@role_required(["Lawyer"])
+@login_required
+def api_dashboard_page(tab):
+  """API endpoint for lazily paging through the dashboard clients and cases tabs"""
+  cursor = request.args.get("cursor")
+  limit = request.args.get("limit", DEFAULT_PAGE_SIZE, type=int)
+
+  try:
+    if tab == "clients":
+      clients, next_cursor = client_page(cursor, limit)
+      items = [{
+        "unique_id": client.unique_id,
+        "name": client.full_name,
+        "phone": client.phone,
+        "email": client.email,
+        "url": url_for("client.client_profile", client_id=client.unique_id),
+      } for client in clients]
+    elif tab == "cases":
+      cases, next_cursor = case_page(cursor, limit)
+      items = [{
+        "alias": case.alias,
+        "url": url_for("case.case_detail", case_id=case.alias),
+        "client_name": case.client.full_name,
+        "client_url": url_for("client.client_profile", client_id=case.client.unique_id),
+        "opened_date": case.opened_date.strftime("%b %d, %Y at %I:%M %p") if case.opened_date else None,
+        "closed_date": str(case.closed_date) if case.closed_date else None,
+        "status": case.status.value if case.status else None,
+      } for case in cases]
+    else:
+      return jsonify({"error": "Unknown tab"}), 404
+
+  except ValueError as e:
+    return jsonify({"error": str(e)}), 400
+
+  return jsonify({"items": items, "next_cursor": next_cursor})
+
+EXPORT_BATCH_SIZE = 1000
+
+def export_filters():
+  """Date range and case status from the query string, 400 if malformed"""
+  try:
+    start = request.args.get("start")
+    end = request.args.get("end")
+    status = request.args.get("status")
+    return (
+      date.fromisoformat(start) if start else None,
+      date.fromisoformat(end) if end else None,
+      CaseStatus(status) if status else None,
+    )
+  except ValueError:
+    abort(400)
+
+def export_response(name, export_format, header, rows):
+  filename = f"{name}-{date.today().isoformat()}.{export_format}"
+  if export_format == "csv":
+    return stream_csv(filename, header, rows)
+  return stream_xlsx(filename, name.title(), header, rows)
+
+@dashboard_bp.route("/export/payments.<any(csv, xlsx):export_format>")
+@role_required(["Lawyer"])
+@login_required
+def export_payments(export_format):
+  """Download the lawyer's payment ledger, optionally filtered by date received and case status"""
+  start, end, status = export_filters()
+
+  query = db.session.query(
+    Payment.unique_id, Payment.date_received, Payment.amount, Payment.payment_method, Payment.reference,
+    Case.alias, Case.title, Client.first_name, Client.last_name
+  ).join(Case, Payment.case_id == Case.id).join(Client, Case.client_id == Client.id).filter(
+    Case.lawyer_id == current_user.id
+  )
+  if start:
+    query = query.filter(Payment.date_received >= start)
+  if end:
+    query = query.filter(Payment.date_received <= end)
+  if status:
+    query = query.filter(Case.status == status)
+
+  rows = query.order_by(Payment.date_received, Payment.id).execution_options(yield_per=EXPORT_BATCH_SIZE)
+  header = ["Payment ID", "Date Received", "Amount", "Method", "Reference", "Case", "Case Title", "Client First Name", "Client Last Name"]
+  return export_response("payments", export_format, header, rows)
+
+@dashboard_bp.route("/export/cases.<any(csv, xlsx):export_format>")
+@role_required(["Lawyer"])
+@login_required
+def export_cases(export_format):
+  """Download the lawyer's case list, optionally filtered by opening date and status"""
+  start, end, status = export_filters()
+
+  query = db.session.query(
+    Case.unique_id, Case.alias, Case.title, Case.status, Case.case_type, Case.case_number, Case.court_name,
+    Client.first_name, Client.last_name, Case.opened_date, Case.closed_date, Case.amount_paid, Case.payment_count
+  ).join(Client, Case.client_id == Client.id).filter(Case.lawyer_id == current_user.id)
+  if start:
+    query = query.filter(Case.opened_date >= datetime.combine(start, time.min))
+  if end:
+    query = query.filter(Case.opened_date <= datetime.combine(end, time.max))
+  if status:
+    query = query.filter(Case.status == status)
+
+  rows = query.order_by(Case.opened_date, Case.id).execution_options(yield_per=EXPORT_BATCH_SIZE)
+  header = [
+    "Case ID", "Alias", "Title", "Status", "Case Type", "Case Number", "Court",
+    "Client First Name", "Client Last Name", "Opened", "Closed", "Amount Paid", "Payments"
+  ]
+  return export_response("cases", export_format, header, rows)
+
 @dashboard_bp.route("/client/dashboard")
 @role_required(["Client"])
 @login_required
+@replica_reads
+@cached_client_view()
 def client_index():
   context = {
     "lawyer": Lawyers.query.get(current_user.lawyer_id),
     "cases": Case.query.filter_by(client_id=current_user.id).all(),
+    "calendar_url": calendar_feed_url(current_user),
   }
 
   return render_template("Client/index.html", **context)
+
+CALENDAR_BATCH_SIZE = 500
+
+def calendar_serializer():
+  return URLSafeSerializer(current_app.secret_key, salt="calendar-feed")
+
+def calendar_feed_url(user):
+  """
+  Subscription link for the user's calendar. Calendar apps cannot log in, so the
+  link carries the signed session identity instead. It stops working once the
+  user is deactivated, and rotating SECRET_KEY revokes every link.
+  """
+  token = calendar_serializer().dumps(user.get_id())
+  return url_for("dashboard.calendar_feed", token=token, _external=True)
+
+def upcoming_event_filters(user):
+  """Events from today on, on cases the user is the lawyer or the client of"""
+  owner = Case.lawyer_id if user.role_name == "Lawyer" else Case.client_id
+  return [owner == user.id, Event.event_date >= get_local_time().date()]
+
+@dashboard_bp.route("/calendar/<string:token>.ics")
+def calendar_feed(token):
+  """
+  iCalendar feed of the user's upcoming events. The validators come from one
+  aggregate query, so polls that find nothing new get a 304 without the events
+  being loaded; otherwise the feed is written straight off a streamed query.
+  """
+  try:
+    user = load_user_cached(calendar_serializer().loads(token))
+  except BadSignature:
+    user = None
+  # Deactivated users cannot log in, so their links must not keep serving case data either
+  if user is None or not user.is_active:
+    abort(404)
+
+  filters = upcoming_event_filters(user)
+  count, changed, latest_id = db.session.query(
+    func.count(Event.id),
+    func.max(func.coalesce(Event.updated_at, Event.created_at)),
+    func.max(Event.id)
+  ).join(Case, Event.case_id == Case.id).filter(*filters).one()
+
+  # The date is part of the tag because past events drop out of the feed
+  version = f"{get_local_time().date()}:{count}:{latest_id}:{changed}"
+  etag = hashlib.sha1(version.encode("utf-8")).hexdigest()
+
+  # No Last-Modified: the newest change time misses deleted events and the date
+  # rolling over, so a client revalidating by date alone could be kept on a stale feed
+  headers = {"ETag": quote_etag(etag), "Cache-Control": "private, no-cache"}
+  if not is_resource_modified(request.environ, etag=etag):
+    return Response(status=304, headers=headers)
+
+  rows = db.session.execute(
+    select(Event, Case.alias).join(Case, Event.case_id == Case.id).filter(*filters).order_by(
+      Event.event_date, Event.event_time, Event.id
+    ).execution_options(yield_per=CALENDAR_BATCH_SIZE)
+  )
+
+  name = f"{user.first_name} {user.last_name} - Cases"
+  headers["Content-Disposition"] = 'inline; filename="calendar.ics"'
+  return Response(stream_with_context(generate_calendar(name, rows)), mimetype="text/calendar", headers=headers)
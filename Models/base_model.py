@@ -1,10 +1,11 @@
 from flask_sqlalchemy import SQLAlchemy
 from datetime import datetime, timedelta
-import random, pytz
+import pytz
 from flask_bcrypt import Bcrypt
 from sqlalchemy.dialects.postgresql import ENUM
+from .routing_session import RoutingSession
 
-db = SQLAlchemy()
+db = SQLAlchemy(session_options={"class_": RoutingSession})
 bcrypt = Bcrypt()
 
 def get_local_time():
@@ -19,11 +20,22 @@ class BaseModel(db.Model):
 
   def __init__(self, *args, **kwargs):
     super().__init__(*args, **kwargs)
-    self.unique_id = random.randint(10000000, 99999999)
+    if self.unique_id is None:
+      from .unique_id import allocate_unique_id
+      self.unique_id = allocate_unique_id(type(self))
 
   def __repr__(self):
     return f"{self.id} - {self.unique_id}"
 
+class TimelineMixin:
+  """
+  Models whose creation is announced on their case's timeline. The note is added in
+  the same flush as the row (see Models.case.add_timeline_notes), so both commit together.
+  """
+  def timeline_note(self):
+    """Content of the client-visible note, or None to skip it"""
+    return None
+
 class UserBaseModel(db.Model):
   __abstract__ = True
   first_name = db.Column(db.String(50), nullable=False)
@@ -48,4 +60,5 @@ class UserBaseModel(db.Model):
     return f"{self.first_name} {self.last_name}"
   
   def get_id(self):
-    return self.unique_id
+    """Session identity, prefixed with the role so the user loader only queries one table"""
+    return f"{self.role_name}:{self.unique_id}"
@@ -1,6 +1,8 @@
-from .base_model import db, BaseModel, get_local_time
+from .base_model import db, BaseModel, TimelineMixin, get_local_time
 from .payment import Payment
 from .event import Event
+from sqlalchemy import case as sql_case, event, update
+from sqlalchemy.orm import Session
 from enum import Enum
 
 class CaseStatus(Enum):
@@ -8,7 +10,7 @@ class CaseStatus(Enum):
   CLOSED = 'closed'
   PENDING = 'pending'
 
-class Case(BaseModel, db.Model):
+class Case(TimelineMixin, BaseModel, db.Model):
   """Represents a legal case"""
   __tablename__ = 'cases'  
   title = db.Column(db.String(200), nullable=False)
@@ -28,11 +30,39 @@ class Case(BaseModel, db.Model):
   # Timestamps
   opened_date = db.Column(db.DateTime, default=get_local_time())
   closed_date = db.Column(db.DateTime, nullable=True)
+
+  # Payment ledger, maintained alongside every Payment insert
+  amount_paid = db.Column(db.Integer(), nullable=False, default=0, server_default="0")
+  payment_count = db.Column(db.Integer(), nullable=False, default=0, server_default="0")
+  last_payment_date = db.Column(db.Date, nullable=True)
+
+  # Bumped whenever the case or anything shown on its detail page changes
+  version = db.Column(db.Integer(), nullable=False, default=1, server_default="1")
   
   # Relationships
   notes = db.relationship('CaseNote', backref='case', lazy='dynamic', cascade='all, delete-orphan')
   payments = db.relationship('Payment', backref='case', lazy='dynamic', cascade='all, delete-orphan')
   events = db.relationship('Event', backref='case', lazy='dynamic', cascade='all, delete-orphan')
+
+  def record_payment(self, payment):
+    """Add a payment to the ledger in the current transaction, as a single atomic UPDATE"""
+    Case.query.filter_by(id=self.id).update({
+      Case.amount_paid: Case.amount_paid + payment.amount,
+      Case.payment_count: Case.payment_count + 1,
+      Case.last_payment_date: sql_case(
+        (Case.last_payment_date == None, payment.date_received),
+        (Case.last_payment_date < payment.date_received, payment.date_received),
+        else_=Case.last_payment_date
+      ),
+    }, synchronize_session=False)
+    db.session.expire(self, ["amount_paid", "payment_count", "last_payment_date"])
+
+  def timeline_note(self):
+    return "Case opened"
+
+  def refresh_payment_summary(self):
+    """Rebuild the ledger from the payments table, e.g. after backfilling payments"""
+    self.amount_paid, self.payment_count, self.last_payment_date = Payment.summary_for(self.id)
   
   def __repr__(self):
     return f'<Case {self.title} - {self.status}>'
@@ -41,7 +71,7 @@ class CaseNote(BaseModel, db.Model):
   """Timeline notes/updates for a case"""
   __tablename__ = 'case_notes'
   content = db.Column(db.Text, nullable=False)
-  created_at = db.Column(db.DateTime, default=get_local_time(), index=True)
+  created_at = db.Column(db.DateTime, default=get_local_time())
   
   # Foreign key
   case_id = db.Column(db.Integer, db.ForeignKey('cases.id'), nullable=False)
@@ -60,5 +90,76 @@ class CaseFiles(BaseModel, db.Model):
   file_type = db.Column(db.String(10), nullable=False)
   case_note_id = db.Column(db.Integer(), db.ForeignKey("case_notes.id"))
 
+  @property
+  def display_name(self):
+    """The uploaded file's name, without the bucket prefix of its key"""
+    return self.file_name.rsplit("/", 1)[-1]
+
   def __repr__(self):
     return f'<CaseFile {self.file_name}>'
+
+# Composite indexes matching the route predicates and sort orders
+# Dashboard case tab: lawyer's cases newest first, keyset paged
+db.Index("ix_cases_lawyer_id_opened_date", Case.lawyer_id, Case.opened_date.desc(), Case.id.desc())
+# Case pages look cases up by alias within the lawyer's or the client's cases
+db.Index("ix_cases_lawyer_id_alias", Case.lawyer_id, Case.alias)
+db.Index("ix_cases_client_id_alias", Case.client_id, Case.alias)
+# Case timeline, newest first
+db.Index("ix_case_notes_case_id_created_at", CaseNote.case_id, CaseNote.created_at.desc())
+db.Index("ix_case_files_case_note_id", CaseFiles.case_note_id)
+db.Index("ix_payments_case_id_date_received", Payment.case_id, Payment.date_received.desc())
+# Upcoming events of a case and the calendar feeds
+db.Index("ix_events_case_id_event_date", Event.case_id, Event.event_date, Event.event_time)
+
+def _changed_case_ids(session):
+  """Ids of cases whose own row or whose notes, files, payments or events are being flushed"""
+  case_ids = set()
+  for obj in session.new | session.dirty | session.deleted:
+    if isinstance(obj, Case):
+      if obj in session.dirty and session.is_modified(obj) and obj.id is not None:
+        case_ids.add(obj.id)
+    elif isinstance(obj, (CaseNote, Payment, Event)):
+      case_ids.add(obj.case_id)
+    elif isinstance(obj, CaseFiles) and obj.case_note_id is not None:
+      case_note = session.get(CaseNote, obj.case_note_id)
+      if case_note is not None:
+        case_ids.add(case_note.case_id)
+  case_ids.discard(None)
+  return case_ids
+
+@event.listens_for(Session, "before_flush")
+def bump_case_versions(session, flush_context, instances):
+  """Keep Case.version in step with every write that changes what a case page shows"""
+  case_ids = _changed_case_ids(session)
+  if not case_ids:
+    return
+
+  for case_id in list(case_ids):
+    loaded = session.identity_map.get((Case, (case_id,), None))
+    if loaded is not None and loaded not in session.deleted:
+      # Flushed with the rest of the row, then expired and reloaded on next access
+      loaded.version = Case.version + 1
+      case_ids.discard(case_id)
+
+  if case_ids:
+    session.execute(update(Case).where(Case.id.in_(case_ids)).values(version=Case.version + 1))
+
+@event.listens_for(Session, "before_flush")
+def add_timeline_notes(session, flush_context, instances):
+  """Add the timeline note of every new TimelineMixin row to the same flush"""
+  for obj in list(session.new):
+    if not isinstance(obj, TimelineMixin):
+      continue
+    content = obj.timeline_note()
+    if not content:
+      continue
+
+    note = CaseNote(content=content, is_internal=False, is_editable=False)
+    if isinstance(obj, Case):
+      # The case has no id yet, the relationship orders the inserts
+      note.case = obj
+    elif obj.case_id is not None:
+      note.case_id = obj.case_id
+    else:
+      note.case = obj.case
+    session.add(note)
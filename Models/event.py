@@ -1,12 +1,19 @@
-from .base_model import db, BaseModel, get_local_time
+from .base_model import db, BaseModel, TimelineMixin, get_local_time
 from enum import Enum
 
 class EventType(Enum):
   COURT_DATE = 'court_date'
   CLIENT_MEETING = 'client_meeting'
   FILING_DEADLINE = 'filing_deadline'
+  DISCOVERY_DEADLINE = 'discovery_deadline'
+  DEPOSITION = 'deposition'
+  HEARING = 'hearing'
+  TRIAL = 'trial'
+  MEDIATION = 'mediation'
+  CONSULTATION = 'consultation'
+  OTHER = 'other'
 
-class Event(BaseModel, db.Model):
+class Event(TimelineMixin, BaseModel, db.Model):
     """Calendar events for cases (court dates, meetings, deadlines)"""
     __tablename__ = 'events'
     
@@ -20,7 +27,12 @@ class Event(BaseModel, db.Model):
     case_id = db.Column(db.Integer, db.ForeignKey('cases.id'), nullable=False)
     
     created_at = db.Column(db.DateTime, default=get_local_time())
+    # Drives the ETag and Last-Modified of the calendar feeds
+    updated_at = db.Column(db.DateTime, default=get_local_time, onupdate=get_local_time)
     
+    def timeline_note(self):
+      return f"Event scheduled: {self.title} on {self.event_date}"
+
     @property
     def ics_filename(self):
       """Generate filename for .ics calendar file"""
@@ -1,4 +1,5 @@
-from .base_model import db, BaseModel, get_local_time
+from .base_model import db, BaseModel, TimelineMixin, get_local_time
+from sqlalchemy import func
 from enum import Enum
 
 class PaymentType(Enum):
@@ -7,7 +8,7 @@ class PaymentType(Enum):
   BANK = 'bank'
   CARD = 'card'
 
-class Payment(BaseModel, db.Model):
+class Payment(TimelineMixin, BaseModel, db.Model):
   """Payment records for cases"""
   __tablename__ = 'payments'
   amount = db.Column(db.Integer(), nullable=False)
@@ -16,6 +17,20 @@ class Payment(BaseModel, db.Model):
   reference = db.Column(db.String(100))
   case_id = db.Column(db.Integer, db.ForeignKey('cases.id'), nullable=False)
   created_at = db.Column(db.DateTime, default=get_local_time())
+
+  @classmethod
+  def summary_for(cls, case_id):
+    """Total, count and latest date of a case's payments, aggregated in the database"""
+    total, count, last_date = db.session.query(
+      func.coalesce(func.sum(cls.amount), 0),
+      func.count(cls.id),
+      func.max(cls.date_received)
+    ).filter(cls.case_id == case_id).one()
+    return total, count, last_date
+
+  def timeline_note(self):
+    method = f" via {self.payment_method.value.title()}" if self.payment_method else ""
+    return f"Payment of Ksh{self.amount} received{method}"
   
   def __repr__(self):
     return f'<Payment ${self.amount} - Case {self.case_id}>'
@@ -0,0 +1,112 @@
+from flask import current_app, g, has_request_context
+from flask_sqlalchemy.session import Session
+from sqlalchemy import text
+from sqlalchemy.sql.selectable import SelectBase
+import itertools, logging, math, threading, time
+
+logger = logging.getLogger(__name__)
+
+# Seconds a PostgreSQL standby is behind, 0 once it has replayed all it received
+REPLICA_LAG_SQL = text(
+  "SELECT CASE WHEN NOT pg_is_in_recovery() OR pg_last_wal_receive_lsn() = pg_last_wal_replay_lsn() THEN 0 "
+  "ELSE EXTRACT(EPOCH FROM now() - pg_last_xact_replay_timestamp()) END"
+)
+
+class ReplicaHealth:
+  """
+  Which replicas of this process may take reads. Each is probed at most every
+  REPLICA_CHECK_INTERVAL seconds; one that fails the probe, lags more than
+  REPLICA_MAX_LAG seconds or loses a connection is skipped for REPLICA_RETRY_AFTER.
+  """
+  def __init__(self):
+    self._lock = threading.Lock()
+    self._checked = {}
+    self._down_until = {}
+    self._turn = itertools.count()
+
+  def mark_down(self, key, reason, seconds):
+    now = time.monotonic()
+    with self._lock:
+      was_down = self._down_until.get(key, 0) > now
+      self._down_until[key] = now + seconds
+    if not was_down:
+      logger.warning(f"Read replica {key} out of rotation for {seconds}s: {reason}")
+
+  def _probe(self, engine, max_lag):
+    """None when the replica can serve reads, otherwise why not"""
+    with engine.connect() as connection:
+      if engine.dialect.name != "postgresql":
+        connection.execute(text("SELECT 1"))
+        return None
+      lag = connection.execute(REPLICA_LAG_SQL).scalar()
+    if lag is not None and lag > max_lag:
+      return f"{lag:.1f}s behind the primary"
+    return None
+
+  def usable(self, key, engine, config):
+    now = time.monotonic()
+    with self._lock:
+      if self._down_until.get(key, 0) > now:
+        return False
+      due = now - self._checked.get(key, -math.inf) >= config["REPLICA_CHECK_INTERVAL"]
+      if due:
+        # Claimed before probing, so concurrent requests do not all probe at once
+        self._checked[key] = now
+    if not due:
+      return True
+
+    try:
+      problem = self._probe(engine, config["REPLICA_MAX_LAG"])
+    except Exception as e:
+      problem = str(e).split("\n")[0]
+    if problem:
+      self.mark_down(key, problem, config["REPLICA_RETRY_AFTER"])
+      return False
+    return True
+
+  def choose(self, engines, config):
+    """A usable replica engine, taking turns between them, or None"""
+    keys = sorted(engines)
+    start = next(self._turn)
+    for offset in range(len(keys)):
+      key = keys[(start + offset) % len(keys)]
+      if self.usable(key, engines[key], config):
+        return engines[key]
+    return None
+
+replica_health = ReplicaHealth()
+
+class RoutingSession(Session):
+  """
+  Sends the SELECTs of views marked with replica_reads (Utils/replicas.py) to a
+  read replica, the same one for the whole session. Everything else goes to the
+  primary, and so does every statement after the session has written, so it
+  reads its own writes.
+  """
+  def get_bind(self, mapper=None, clause=None, bind=None, **kwargs):
+    if bind is None:
+      if self._flushing or (clause is not None and not isinstance(clause, SelectBase)):
+        self._record_write()
+      elif clause is not None and self._reads_from_replica(clause):
+        replica = self._replica()
+        if replica is not None:
+          return replica
+    return super().get_bind(mapper=mapper, clause=clause, bind=bind, **kwargs)
+
+  def _record_write(self):
+    self.info["wrote"] = True
+    if has_request_context():
+      g.database_write = True
+
+  def _reads_from_replica(self, clause):
+    return (
+      has_request_context() and g.get("read_replica", False) and not self.info.get("wrote")
+      and getattr(clause, "_for_update_arg", None) is None
+    )
+
+  def _replica(self):
+    if "replica" not in self.info:
+      engines = current_app.extensions.get("replicas", {})
+      self.info["replica"] = replica_health.choose(engines, current_app.config)
+      g.replica_used = self.info["replica"] is not None
+    return self.info["replica"]
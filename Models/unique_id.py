@@ -0,0 +1,153 @@
+from .base_model import db
+from flask import current_app
+from sqlalchemy import select, update, insert, case, event
+from sqlalchemy.exc import IntegrityError
+from sqlalchemy.orm import Session
+from contextlib import nullcontext
+import hashlib, threading
+
+# unique_ids are 8 digit numbers shown in URLs
+ID_MIN = 10000000
+ID_SPACE = 90000000
+# Smallest even number of bits covering ID_SPACE, so both Feistel halves are equal
+HALF_BITS = 14
+HALF_MASK = (1 << HALF_BITS) - 1
+ROUNDS = 4
+DEFAULT_KEY = "lawfirm-unique-ids"
+DEFAULT_BLOCK_SIZE = 1000
+
+class UniqueIdBlock(db.Model):
+  """Next unreserved block of the unique_id counter of each table"""
+  __tablename__ = "unique_id_blocks"
+  name = db.Column(db.String(100), primary_key=True)
+  next_block = db.Column(db.BigInteger(), nullable=False)
+
+def _round(key, index, value):
+  digest = hashlib.blake2b(value.to_bytes(4, "big"), key=key, person=bytes([index]) * 16, digest_size=4).digest()
+  return int.from_bytes(digest, "big") & HALF_MASK
+
+def permute(counter, key):
+  """
+  Map a counter in [0, ID_SPACE) to a unique_id. A Feistel network over 28 bits
+  is a bijection; re-encrypting until the value falls inside ID_SPACE (cycle
+  walking) keeps it one, so distinct counters always give distinct ids.
+  """
+  value = counter
+  while True:
+    left, right = value >> HALF_BITS, value & HALF_MASK
+    for index in range(ROUNDS):
+      left, right = right, left ^ _round(key, index, right)
+    value = (left << HALF_BITS) | right
+    if value < ID_SPACE:
+      return ID_MIN + value
+
+class UniqueIdAllocator:
+  """
+  Hands out unique_ids from counter blocks reserved in unique_id_blocks. A block is
+  reserved in its own short transaction, so it is never reused even if the caller
+  rolls back, and costs one round trip per block rather than per id.
+  """
+  def __init__(self):
+    self._pools = {}
+    # First unreserved block as seen by this process
+    self._floors = {}
+    # Re-entrant: a rollback listener may run on a thread that is allocating
+    self._lock = threading.RLock()
+
+  def _transaction(self, reserving=None):
+    """
+    SQLite allows one writer at a time, so a second connection would wait on the
+    caller's own open transaction; reserve on the session's connection instead.
+    The reservation then only holds if that transaction commits; see discard_pending.
+    """
+    if db.engine.dialect.name == "sqlite":
+      if reserving:
+        db.session.info.setdefault("unique_id_tables", set()).add(reserving)
+      return nullcontext(db.session.connection())
+    return db.engine.begin()
+
+  def discard_pending(self, names):
+    """
+    Drop the pooled ids of tables whose block was reserved in a transaction that
+    rolled back. The counter row went back with it, so another process may reserve
+    the same block; the floor keeps this process from reserving it again.
+    """
+    with self._lock:
+      for name in names:
+        self._pools.pop(name, None)
+
+  def _config(self, name):
+    """Permutation key of a table, so tables do not share an id sequence, and the block size"""
+    key = current_app.config.get("UNIQUE_ID_KEY") or DEFAULT_KEY
+    block_size = current_app.config.get("UNIQUE_ID_BLOCK_SIZE") or DEFAULT_BLOCK_SIZE
+    return hashlib.blake2b(f"{key}:{name}".encode("utf-8"), digest_size=32).digest(), block_size
+
+  def _reserve(self, name, blocks):
+    """Reserve `blocks` consecutive blocks in a transaction of their own, returns the first one"""
+    floor = self._floors.get(name, 0)
+    while True:
+      with self._transaction(name) as connection:
+        reserved = connection.execute(
+          update(UniqueIdBlock).where(UniqueIdBlock.name == name)
+          .values(next_block=case((UniqueIdBlock.next_block < floor, floor), else_=UniqueIdBlock.next_block) + blocks)
+          .returning(UniqueIdBlock.next_block)
+        ).scalar()
+      if reserved is not None:
+        self._floors[name] = reserved
+        return reserved - blocks
+
+      try:
+        with self._transaction(name) as connection:
+          connection.execute(insert(UniqueIdBlock).values(name=name, next_block=floor + blocks))
+        self._floors[name] = floor + blocks
+        return floor
+      except IntegrityError:
+        # Another worker created the row first
+        continue
+
+  def _refill(self, table, pool, count):
+    key, block_size = self._config(table.name)
+    blocks = -(-count // block_size)
+    first = self._reserve(table.name, blocks)
+
+    start, end = first * block_size, min((first + blocks) * block_size, ID_SPACE)
+    if start >= end:
+      raise RuntimeError(f"unique_id space of {table.name} is exhausted")
+    ids = [permute(counter, key) for counter in range(start, end)]
+
+    # Rows created before the allocator carry random ids that may fall in this block
+    column, taken = table.c.unique_id, set()
+    with self._transaction() as connection:
+      for offset in range(0, len(ids), 1000):
+        chunk = ids[offset:offset + 1000]
+        taken.update(connection.execute(select(column).where(column.in_(chunk))).scalars())
+
+    pool.extend(unique_id for unique_id in ids if unique_id not in taken)
+
+  def allocate(self, model, count=1):
+    """`count` unused unique_ids for `model`'s table"""
+    table = model.__table__
+    with self._lock:
+      pool = self._pools.setdefault(table.name, [])
+      while len(pool) < count:
+        self._refill(table, pool, count - len(pool))
+      ids, pool[:] = pool[:count], pool[count:]
+    return ids
+
+allocator = UniqueIdAllocator()
+
+@event.listens_for(Session, "after_commit")
+def keep_reserved_blocks(session):
+  session.info.pop("unique_id_tables", None)
+
+@event.listens_for(Session, "after_rollback")
+def discard_reserved_blocks(session):
+  names = session.info.pop("unique_id_tables", None)
+  if names:
+    allocator.discard_pending(names)
+
+def allocate_unique_ids(model, count):
+  return allocator.allocate(model, count)
+
+def allocate_unique_id(model):
+  return allocator.allocate(model, 1)[0]
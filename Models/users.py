@@ -1,5 +1,6 @@
 from .base_model import BaseModel, UserBaseModel, db
 from flask_login import UserMixin
+from sqlalchemy import DDL, event, func, literal_column
 from .case import Case
 
 class Lawyers(BaseModel, UserBaseModel, db.Model, UserMixin):
@@ -31,3 +32,37 @@ class Client(BaseModel, UserBaseModel, db.Model, UserMixin):
   
   def __repr__(self):
     return f'<Client {self.full_name}>'
+
+# Dashboard clients tab: lawyer's clients newest first, keyset paged
+db.Index("ix_clients_lawyer_id_created_at", Client.lawyer_id, Client.created_at.desc(), Client.id.desc())
+
+def client_search_document():
+  """Lower-cased name, email and phone of a client; matches the trigram index expression on PostgreSQL"""
+  space, empty = literal_column("' '"), literal_column("''")
+  return func.lower(
+    Client.first_name + space + Client.last_name + space +
+    func.coalesce(Client.email, empty) + space + func.coalesce(Client.phone, empty)
+  )
+
+# PostgreSQL: trigram GIN index so substring (I)LIKE searches don't scan the table
+event.listen(Client.__table__, "before_create", DDL("CREATE EXTENSION IF NOT EXISTS pg_trgm").execute_if(dialect="postgresql"))
+db.Index(
+  "ix_clients_search_trgm",
+  client_search_document().label("search_document"),
+  postgresql_using="gin",
+  postgresql_ops={"search_document": "gin_trgm_ops"},
+).ddl_if(dialect="postgresql")
+
+# SQLite: FTS5 trigram table kept in sync with clients by triggers
+for statement in (
+  "CREATE VIRTUAL TABLE IF NOT EXISTS clients_fts USING fts5(first_name, last_name, email, phone, content='clients', content_rowid='id', tokenize='trigram')",
+  "CREATE TRIGGER IF NOT EXISTS clients_fts_insert AFTER INSERT ON clients BEGIN "
+  "INSERT INTO clients_fts(rowid, first_name, last_name, email, phone) VALUES (new.id, new.first_name, new.last_name, new.email, new.phone); END",
+  "CREATE TRIGGER IF NOT EXISTS clients_fts_delete AFTER DELETE ON clients BEGIN "
+  "INSERT INTO clients_fts(clients_fts, rowid, first_name, last_name, email, phone) VALUES ('delete', old.id, old.first_name, old.last_name, old.email, old.phone); END",
+  "CREATE TRIGGER IF NOT EXISTS clients_fts_update AFTER UPDATE ON clients BEGIN "
+  "INSERT INTO clients_fts(clients_fts, rowid, first_name, last_name, email, phone) VALUES ('delete', old.id, old.first_name, old.last_name, old.email, old.phone); "
+  "INSERT INTO clients_fts(rowid, first_name, last_name, email, phone) VALUES (new.id, new.first_name, new.last_name, new.email, new.phone); END",
+):
+  event.listen(Client.__table__, "after_create", DDL(statement).execute_if(dialect="sqlite"))
+event.listen(Client.__table__, "before_drop", DDL("DROP TABLE IF EXISTS clients_fts").execute_if(dialect="sqlite"))
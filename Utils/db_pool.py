@@ -0,0 +1,103 @@
+from flask import g, has_request_context
+from sqlalchemy.engine import make_url
+from sqlalchemy.exc import TimeoutError as PoolTimeoutError
+from sqlalchemy.pool import QueuePool
+import logging, threading, time
+
+logger = logging.getLogger(__name__)
+
+class PoolStats:
+  """Connection checkouts of this process and how long they waited"""
+  def __init__(self, slow_checkout=0.1):
+    self.slow_checkout = slow_checkout
+    self._lock = threading.Lock()
+    self.reset()
+
+  def reset(self):
+    with self._lock:
+      self.checkouts = 0
+      self.slow_checkouts = 0
+      self.timeouts = 0
+      self.wait_total = 0.0
+      self.wait_max = 0.0
+
+  def record(self, wait, timed_out=False):
+    with self._lock:
+      self.checkouts += 1
+      self.wait_total += wait
+      self.wait_max = max(self.wait_max, wait)
+      if timed_out:
+        self.timeouts += 1
+      elif wait >= self.slow_checkout:
+        self.slow_checkouts += 1
+
+  def snapshot(self):
+    with self._lock:
+      return {
+        "checkouts": self.checkouts,
+        "slow_checkouts": self.slow_checkouts,
+        "timeouts": self.timeouts,
+        "wait_total_ms": round(self.wait_total * 1000, 1),
+        "wait_avg_ms": round(self.wait_total * 1000 / self.checkouts, 2) if self.checkouts else 0.0,
+        "wait_max_ms": round(self.wait_max * 1000, 1),
+      }
+
+pool_stats = PoolStats()
+
+class TimedQueuePool(QueuePool):
+  """
+  QueuePool that records how long each checkout took to get a connection, either
+  waiting for one to be returned or opening a new one. The wait of the current
+  request is added to its query stats (Utils/query_stats.py) when those are on.
+  """
+  def _do_get(self):
+    start = time.perf_counter()
+    try:
+      connection = super()._do_get()
+    except PoolTimeoutError:
+      wait = time.perf_counter() - start
+      pool_stats.record(wait, timed_out=True)
+      logger.warning(f"Timed out after {wait * 1000:.0f}ms waiting for a database connection: {self.status()}")
+      raise
+
+    wait = time.perf_counter() - start
+    pool_stats.record(wait)
+    if wait >= pool_stats.slow_checkout:
+      logger.warning(f"Waited {wait * 1000:.0f}ms for a database connection: {self.status()}")
+    if has_request_context() and "query_stats" in g:
+      g.query_stats.pool_wait += wait
+    return connection
+
+def engine_options(database_url, pool_size=5, max_overflow=5, pool_timeout=10, pool_recycle=1800,
+                   pre_ping=True, pool_mode="session", connect_timeout=10, slow_checkout_ms=100):
+  """
+  SQLALCHEMY_ENGINE_OPTIONS for a worker process. In "transaction" mode the
+  database is reached through PgBouncer's transaction pooling, where consecutive
+  transactions may run on different server connections, so the driver must not
+  keep server-side prepared statements.
+  """
+  if not database_url:
+    return {}
+  url = make_url(database_url)
+  if url.get_backend_name() == "sqlite" and url.database in (None, "", ":memory:"):
+    # Flask-SQLAlchemy gives in-memory databases a single shared connection
+    return {}
+
+  pool_stats.slow_checkout = slow_checkout_ms / 1000
+  options = {
+    "poolclass": TimedQueuePool,
+    "pool_size": pool_size,
+    "max_overflow": max_overflow,
+    "pool_timeout": pool_timeout,
+    "pool_recycle": pool_recycle,
+    "pool_pre_ping": pre_ping,
+    # Reusing the most recently returned connection leaves surplus ones idle long
+    # enough for the server's idle timeout to close them
+    "pool_use_lifo": True,
+  }
+  if url.get_backend_name() == "postgresql":
+    options["connect_args"] = {"connect_timeout": connect_timeout, "application_name": "lawfirm"}
+    if pool_mode == "transaction" and url.get_driver_name() == "psycopg":
+      # psycopg 3 prepares statements after 5 executions; psycopg2 never does
+      options["connect_args"]["prepare_threshold"] = None
+  return options
@@ -0,0 +1,68 @@
+from flask import Response, stream_with_context
+from enum import Enum
+import csv, tempfile
+
+CHUNK_SIZE = 64 * 1024
+
+class _Echo:
+  """File-like object handing back whatever csv.writer writes to it"""
+  def write(self, value):
+    return value
+
+def _cell(value):
+  return value.value if isinstance(value, Enum) else value
+
+def stream_csv(filename, header, rows):
+  """Stream rows as a CSV download, one line at a time"""
+  def generate():
+    writer = csv.writer(_Echo())
+    yield writer.writerow(header)
+    for row in rows:
+      yield writer.writerow([_cell(value) for value in row])
+
+  return Response(
+    stream_with_context(generate()),
+    mimetype="text/csv",
+    headers={"Content-Disposition": f'attachment; filename="{filename}"'},
+  )
+
+def stream_xlsx(filename, title, header, rows):
+  """
+  Write rows to a write-only workbook, which flushes each row to a temporary file
+  instead of keeping the sheet in memory, then send that file back in chunks.
+  Unlike the CSV export this is not truly streamed: the whole workbook is built
+  before the first byte goes out, because an XLSX is a zip finished at the end.
+  """
+  from openpyxl import Workbook
+
+  workbook = Workbook(write_only=True)
+  sheet = workbook.create_sheet(title)
+  sheet.append(header)
+  for row in rows:
+    sheet.append([_cell(value) for value in row])
+
+  # Unlinked on creation, so only the open handle keeps it and closing it frees the disk space
+  stream = tempfile.TemporaryFile(suffix=".xlsx")
+  try:
+    workbook.save(stream)
+    size = stream.tell()
+    stream.seek(0)
+  except Exception:
+    stream.close()
+    raise
+
+  def generate():
+    while chunk := stream.read(CHUNK_SIZE):
+      yield chunk
+
+  response = Response(
+    generate(),
+    mimetype="application/vnd.openxmlformats-officedocument.spreadsheetml.sheet",
+    headers={
+      "Content-Disposition": f'attachment; filename="{filename}"',
+      "Content-Length": str(size),
+    },
+  )
+  # Runs whether or not the body was sent, e.g. when the client disconnects first
+  response.call_on_close(stream.close)
+  return response
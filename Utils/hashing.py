@@ -0,0 +1,18 @@
+from concurrent.futures import ProcessPoolExecutor
+import bcrypt, multiprocessing, os
+
+# Below this many passwords the pool start-up costs more than it saves
+POOL_THRESHOLD = 32
+
+def hash_password(password, rounds=12):
+  """bcrypt hash compatible with Flask-Bcrypt's check_password_hash"""
+  return bcrypt.hashpw(password.encode("utf-8"), bcrypt.gensalt(rounds)).decode("utf-8")
+
+def hash_passwords(passwords, rounds=12):
+  """Hash many passwords across a process pool; bcrypt is CPU bound"""
+  if len(passwords) < POOL_THRESHOLD:
+    return [hash_password(password, rounds) for password in passwords]
+
+  # spawn rather than fork: the caller may be a threaded web worker
+  with ProcessPoolExecutor(max_workers=os.cpu_count(), mp_context=multiprocessing.get_context("spawn")) as pool:
+    return list(pool.map(hash_password, passwords, [rounds] * len(passwords), chunksize=16))
@@ -0,0 +1,82 @@
+from datetime import datetime, timedelta
+import pytz
+
+LOCAL_TZ = pytz.timezone("Africa/Nairobi")
+EVENT_DURATION = timedelta(hours=1)
+PRODID = "-//LawFirm//Case Calendar//EN"
+
+def escape_text(value):
+  """Escape a TEXT property value (RFC 5545 section 3.3.11)"""
+  return (
+    str(value or "").replace("\\", "\\\\").replace(";", "\\;").replace(",", "\\,")
+    .replace("\r\n", "\\n").replace("\n", "\\n")
+  )
+
+def fold(line):
+  """Split a content line into 75 octet chunks, continuation lines start with a space"""
+  encoded = line.encode("utf-8")
+  if len(encoded) <= 75:
+    return line + "\r\n"
+
+  chunks, start, limit = [], 0, 75
+  while start < len(encoded):
+    end = min(start + limit, len(encoded))
+    # Never split inside a multi-byte character
+    while end < len(encoded) and (encoded[end] & 0xC0) == 0x80:
+      end -= 1
+    chunks.append(encoded[start:end].decode("utf-8"))
+    start, limit = end, 74
+  return "\r\n ".join(chunks) + "\r\n"
+
+def to_utc(value):
+  """Naive timestamps in the database are Nairobi local time"""
+  if value.tzinfo is None:
+    value = LOCAL_TZ.localize(value)
+  return value.astimezone(pytz.utc)
+
+def utc_stamp(value):
+  return to_utc(value).strftime("%Y%m%dT%H%M%SZ")
+
+def event_lines(event, case_alias=None, host="lawfirm"):
+  """Content lines of one VEVENT; events without a time are all-day"""
+  lines = [
+    "BEGIN:VEVENT",
+    f"UID:event-{event.unique_id}@{host}",
+    f"DTSTAMP:{utc_stamp(event.updated_at or event.created_at or datetime.now(pytz.utc))}",
+  ]
+  if event.event_time:
+    start = datetime.combine(event.event_date, event.event_time)
+    lines += [f"DTSTART:{utc_stamp(start)}", f"DTEND:{utc_stamp(start + EVENT_DURATION)}"]
+  else:
+    lines += [
+      f"DTSTART;VALUE=DATE:{event.event_date.strftime('%Y%m%d')}",
+      f"DTEND;VALUE=DATE:{(event.event_date + timedelta(days=1)).strftime('%Y%m%d')}",
+    ]
+
+  summary = f"{event.title} ({case_alias})" if case_alias else event.title
+  lines.append(f"SUMMARY:{escape_text(summary)}")
+  if event.description:
+    lines.append(f"DESCRIPTION:{escape_text(event.description)}")
+  if event.event_type:
+    lines.append(f"CATEGORIES:{escape_text(event.event_type.value.replace('_', ' ').title())}")
+  lines.append("END:VEVENT")
+  return lines
+
+def generate_calendar(name, rows, host="lawfirm"):
+  """
+  Yield a VCALENDAR one event at a time. `rows` yields (event, case alias) pairs,
+  so a feed can be written straight off a streamed query.
+  """
+  header = [
+    "BEGIN:VCALENDAR",
+    "VERSION:2.0",
+    f"PRODID:{PRODID}",
+    "CALSCALE:GREGORIAN",
+    "METHOD:PUBLISH",
+    f"X-WR-CALNAME:{escape_text(name)}",
+    "X-WR-TIMEZONE:Africa/Nairobi",
+  ]
+  yield "".join(fold(line) for line in header)
+  for event, case_alias in rows:
+    yield "".join(fold(line) for line in event_lines(event, case_alias, host))
+  yield fold("END:VCALENDAR")
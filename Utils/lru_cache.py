@@ -0,0 +1,37 @@
+from collections import OrderedDict
+import threading, time
+
+class LRUCache:
+  """Small thread-safe LRU cache whose entries expire after `ttl` seconds"""
+  def __init__(self, maxsize=1024, ttl=30):
+    self.maxsize = maxsize
+    self.ttl = ttl
+    self._entries = OrderedDict()
+    self._lock = threading.Lock()
+
+  def get(self, key):
+    with self._lock:
+      entry = self._entries.get(key)
+      if entry is None:
+        return None
+      value, expires = entry
+      if expires < time.monotonic():
+        del self._entries[key]
+        return None
+      self._entries.move_to_end(key)
+      return value
+
+  def set(self, key, value):
+    with self._lock:
+      self._entries[key] = (value, time.monotonic() + self.ttl)
+      self._entries.move_to_end(key)
+      while len(self._entries) > self.maxsize:
+        self._entries.popitem(last=False)
+
+  def delete(self, key):
+    with self._lock:
+      self._entries.pop(key, None)
+
+  def clear(self):
+    with self._lock:
+      self._entries.clear()
@@ -0,0 +1,44 @@
+from sqlalchemy import or_, and_, desc
+from datetime import datetime
+import base64, json
+
+DEFAULT_PAGE_SIZE = 25
+MAX_PAGE_SIZE = 100
+
+def encode_cursor(sort_value, row_id):
+  """Encode the (sort value, id) pair of the last row on a page"""
+  payload = json.dumps([sort_value.isoformat() if sort_value else None, row_id])
+  return base64.urlsafe_b64encode(payload.encode("utf-8")).decode("ascii")
+
+def decode_cursor(cursor):
+  """Decode a cursor produced by encode_cursor, raises ValueError if it is malformed"""
+  try:
+    sort_value, row_id = json.loads(base64.urlsafe_b64decode(cursor.encode("ascii")))
+    return (datetime.fromisoformat(sort_value) if sort_value else None), int(row_id)
+  except (TypeError, ValueError, UnicodeError) as e:
+    raise ValueError("Invalid cursor") from e
+
+def keyset_page(query, sort_column, id_column, cursor=None, limit=DEFAULT_PAGE_SIZE):
+  """
+  Return one page of `query` ordered newest first by (sort_column, id_column)
+  together with the cursor for the next page (None on the last page).
+  Each page is a single indexed range scan regardless of how deep the caller has paged.
+  """
+  limit = max(1, min(limit or DEFAULT_PAGE_SIZE, MAX_PAGE_SIZE))
+
+  if cursor:
+    sort_value, row_id = decode_cursor(cursor)
+    query = query.filter(or_(
+      sort_column < sort_value,
+      and_(sort_column == sort_value, id_column < row_id)
+    ))
+
+  rows = query.order_by(desc(sort_column), desc(id_column)).limit(limit + 1).all()
+
+  next_cursor = None
+  if len(rows) > limit:
+    rows = rows[:limit]
+    last = rows[-1]
+    next_cursor = encode_cursor(getattr(last, sort_column.key), getattr(last, id_column.key))
+
+  return rows, next_cursor
@@ -0,0 +1,100 @@
+from flask import g, has_request_context, request
+from blinker import Namespace
+from sqlalchemy import event
+from sqlalchemy.engine import Engine
+from collections import Counter
+import re, time
+
+_in_list = re.compile(r"\((?:\s*[?%][^,)]*,)+\s*[?%][^,)]*\)")
+_whitespace = re.compile(r"\s+")
+_signals = Namespace()
+
+# Sent with the app, the request's method and path and its QueryStats once the
+# response body has been produced, which for a streamed body is after the headers
+query_stats_recorded = _signals.signal("query-stats-recorded")
+
+class QueryBudgetExceeded(Exception):
+  """Raised at the end of a request that crossed a query threshold while QUERY_STATS_RAISE is set"""
+
+class QueryStats:
+  """Statements issued during a single request"""
+  def __init__(self):
+    self.count = 0
+    self.duration = 0.0
+    # Time spent getting a connection from the pool (Utils/db_pool.py)
+    self.pool_wait = 0.0
+    self.shapes = Counter()
+
+  def record(self, statement, duration):
+    self.count += 1
+    self.duration += duration
+    self.shapes[statement_shape(statement)] += 1
+
+  def repeated(self, threshold):
+    return [(shape, count) for shape, count in self.shapes.most_common() if count >= threshold]
+
+def statement_shape(statement):
+  """Collapse whitespace and expanded IN lists so the same query with different parameters compares equal"""
+  return _in_list.sub("(?)", _whitespace.sub(" ", statement).strip())
+
+def _before_cursor_execute(conn, cursor, statement, parameters, context, executemany):
+  if has_request_context() and "query_stats" in g:
+    conn.info.setdefault("query_stats_start", []).append(time.perf_counter())
+
+def _after_cursor_execute(conn, cursor, statement, parameters, context, executemany):
+  if has_request_context() and "query_stats" in g and conn.info.get("query_stats_start"):
+    g.query_stats.record(statement, time.perf_counter() - conn.info["query_stats_start"].pop())
+
+def init_query_stats(app):
+  """
+  Count statements, database time and repeated statement shapes per request.
+  Disabled unless QUERY_STATS_ENABLED is set; thresholds are read from the
+  QUERY_STATS_* config keys. Streamed bodies are checked when they close and get
+  no Server-Timing header; query_stats_recorded reports every request.
+  """
+  if not app.config.get("QUERY_STATS_ENABLED"):
+    return
+
+  if not event.contains(Engine, "before_cursor_execute", _before_cursor_execute):
+    event.listen(Engine, "before_cursor_execute", _before_cursor_execute)
+    event.listen(Engine, "after_cursor_execute", _after_cursor_execute)
+
+  @app.before_request
+  def start_query_stats():
+    g.query_stats = QueryStats()
+
+  def check_budget(stats, method, path):
+    query_stats_recorded.send(app, method=method, path=path, stats=stats)
+    duration_ms = stats.duration * 1000
+    problems = []
+    if stats.count > app.config["QUERY_STATS_MAX_QUERIES"]:
+      problems.append(f"{stats.count} queries (limit {app.config['QUERY_STATS_MAX_QUERIES']})")
+    if duration_ms > app.config["QUERY_STATS_MAX_DURATION_MS"]:
+      problems.append(f"{duration_ms:.1f}ms in the database (limit {app.config['QUERY_STATS_MAX_DURATION_MS']}ms)")
+    for shape, count in stats.repeated(app.config["QUERY_STATS_MAX_REPEATS"]):
+      problems.append(f"possible N+1, statement ran {count} times: {shape[:200]}")
+
+    if problems:
+      message = f"Query budget exceeded on {method} {path}: " + "; ".join(problems)
+      if app.config.get("QUERY_STATS_RAISE"):
+        raise QueryBudgetExceeded(message)
+      app.logger.warning(message)
+
+  @app.after_request
+  def check_query_stats(response):
+    if response.is_streamed:
+      # The body's queries run after the headers are sent, so they are only counted
+      # once it closes, and there is no Server-Timing header to report them in
+      stats = g.get("query_stats")
+      if stats is not None:
+        method, path = request.method, request.path
+        response.call_on_close(lambda: check_budget(stats, method, path))
+      return response
+
+    stats = g.pop("query_stats", None)
+    if stats is None:
+      return response
+
+    response.headers["Server-Timing"] = f'db;dur={stats.duration * 1000:.1f};desc="{stats.count} queries", pool;dur={stats.pool_wait * 1000:.1f}'
+    check_budget(stats, request.method, request.path)
+    return response
@@ -0,0 +1,49 @@
+from flask import g, request, session
+from functools import wraps
+from sqlalchemy import create_engine, event
+from Models.routing_session import replica_health
+import time
+
+def replica_reads(view):
+  """
+  Let a GET view read from a replica (Models/routing_session.py), unless the user
+  wrote within the last REPLICA_STICKY_SECONDS and the replica may not have it yet.
+  """
+  @wraps(view)
+  def decorated_function(*args, **kwargs):
+    if request.method in ("GET", "HEAD") and session.get("primary_until", 0) < time.time():
+      g.read_replica = True
+    return view(*args, **kwargs)
+  return decorated_function
+
+def init_replicas(app):
+  """
+  Create an engine per DATABASE_REPLICA_URLS entry, pooled like the primary. They
+  are kept out of SQLALCHEMY_BINDS so create_all and drop_all never touch them.
+  Keeps a user's reads on the primary for a while after they write, and takes a
+  replica out of rotation as soon as it fails to connect or drops a connection.
+  """
+  if not app.config.get("DATABASE_REPLICA_URLS"):
+    return
+
+  engines = {}
+  for n, url in enumerate(app.config["DATABASE_REPLICA_URLS"]):
+    key = f"replica_{n}"
+    engines[key] = create_engine(url, **app.config.get("SQLALCHEMY_ENGINE_OPTIONS", {}))
+    event.listen(engines[key], "handle_error", _replica_error_handler(key, app.config["REPLICA_RETRY_AFTER"]))
+  app.extensions["replicas"] = engines
+
+  @app.after_request
+  def stick_to_primary(response):
+    if g.pop("database_write", False):
+      session["primary_until"] = time.time() + app.config["REPLICA_STICKY_SECONDS"]
+    return response
+
+def _replica_error_handler(key, retry_after):
+  def handle_error(context):
+    # A stale pooled connection found by pre-ping is replaced without failing the request
+    if context.is_pre_ping:
+      return
+    if context.is_disconnect or context.connection is None:
+      replica_health.mark_down(key, str(context.original_exception).split("\n")[0], retry_after)
+  return handle_error
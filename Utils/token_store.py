@@ -0,0 +1,69 @@
+from flask import current_app
+import json, threading, time
+
+class RedisTokenStore:
+  """Tokens kept in Redis with a TTL, shared by every worker"""
+  def __init__(self, redis, prefix="token:"):
+    self.redis = redis
+    self.prefix = prefix
+
+  def issue(self, token, data, ttl):
+    self.redis.setex(self.prefix + token, int(ttl), json.dumps(data))
+
+  def get(self, token):
+    value = self.redis.get(self.prefix + token)
+    return json.loads(value) if value is not None else None
+
+  def pop(self, token):
+    """Read and delete a token atomically so it can only be redeemed once"""
+    value = self.redis.getdel(self.prefix + token)
+    return json.loads(value) if value is not None else None
+
+class MemoryTokenStore:
+  """Process-local stand-in for tests and single-process development servers"""
+  def __init__(self):
+    self._tokens = {}
+    self._lock = threading.Lock()
+
+  def _purge(self, now):
+    for token in [token for token, (_, expires) in self._tokens.items() if expires <= now]:
+      del self._tokens[token]
+
+  def issue(self, token, data, ttl):
+    now = time.monotonic()
+    with self._lock:
+      self._purge(now)
+      self._tokens[token] = (data, now + ttl)
+
+  def get(self, token):
+    with self._lock:
+      entry = self._tokens.get(token)
+      if entry is None or entry[1] <= time.monotonic():
+        return None
+      return entry[0]
+
+  def pop(self, token):
+    with self._lock:
+      data, expires = self._tokens.pop(token, (None, 0))
+      return data if expires > time.monotonic() else None
+
+def init_token_store(app):
+  """
+  Use Redis unless TOKEN_STORE is "memory". Tokens kept in memory are only seen by
+  the process that issued them, so a missing Redis is a startup error rather than
+  a silent fallback.
+  """
+  kind = app.config.get("TOKEN_STORE")
+  if kind == "memory":
+    app.extensions["token_store"] = MemoryTokenStore()
+    return
+  if kind != "redis":
+    raise RuntimeError(f'Unknown TOKEN_STORE {kind!r}, expected "redis" or "memory"')
+
+  redis = app.extensions.get("redis")
+  if redis is None:
+    raise RuntimeError('TOKEN_STORE is "redis" but REDIS_URL is not set; set it, or TOKEN_STORE=memory for a single process')
+  app.extensions["token_store"] = RedisTokenStore(redis, prefix="password_reset:")
+
+def token_store():
+  return current_app.extensions["token_store"]
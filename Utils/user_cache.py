@@ -0,0 +1,95 @@
+from flask import current_app, has_app_context
+from sqlalchemy import event
+from sqlalchemy.orm import Session, object_session
+from Models.base_model import db
+from Models.users import Lawyers, Client
+from Utils.lru_cache import LRUCache
+import pickle
+
+USER_MODELS = {"Lawyer": Lawyers, "Client": Client}
+
+local_users = LRUCache()
+
+def user_cache_key(identity):
+  return f"user:{identity}"
+
+def _redis():
+  if has_app_context() and current_app.config.get("USER_CACHE_REDIS"):
+    return current_app.extensions.get("redis")
+  return None
+
+def _query_user(identity):
+  role, _, unique_id = identity.partition(":")
+  model = USER_MODELS.get(role)
+  if model is None:
+    # Sessions issued before ids carried the role
+    return Lawyers.query.filter_by(unique_id=identity).first() or Client.query.filter_by(unique_id=identity).first()
+  return model.query.filter_by(unique_id=unique_id).first()
+
+def load_user_cached(identity):
+  """
+  Resolve a Flask-Login identity ("<role>:<unique_id>") to a user, checking the
+  process-local LRU, then Redis when USER_CACHE_REDIS is set, then the database.
+  Cached users are merged into the session without a query.
+  """
+  key = user_cache_key(identity)
+  data = local_users.get(key)
+
+  redis = _redis()
+  if data is None and redis is not None:
+    try:
+      data = redis.get(key)
+    except Exception as e:
+      current_app.logger.warning(f"User cache unavailable: {e}")
+    if data is not None:
+      local_users.set(key, data)
+
+  if data is not None:
+    return db.session.merge(pickle.loads(data), load=False)
+
+  user = _query_user(identity)
+  if user is None:
+    return None
+
+  data = pickle.dumps(user)
+  local_users.set(key, data)
+  if redis is not None:
+    try:
+      redis.setex(key, current_app.config["USER_CACHE_REDIS_TTL"], data)
+    except Exception as e:
+      current_app.logger.warning(f"User cache unavailable: {e}")
+  return user
+
+def invalidate_user(identity):
+  key = user_cache_key(identity)
+  local_users.delete(key)
+  redis = _redis()
+  if redis is not None:
+    try:
+      redis.delete(key)
+    except Exception as e:
+      current_app.logger.warning(f"User cache unavailable: {e}")
+
+def _queue_invalidation(mapper, connection, target):
+  object_session(target).info.setdefault("stale_users", set()).add(target.get_id())
+
+def _flush_invalidations(session):
+  for identity in session.info.pop("stale_users", ()):
+    invalidate_user(identity)
+
+def _drop_invalidations(session, previous_transaction):
+  session.info.pop("stale_users", None)
+
+def init_user_cache(app):
+  """Size the process-local user cache and drop cached users once a profile change commits"""
+  local_users.maxsize = app.config["USER_CACHE_SIZE"]
+  local_users.ttl = app.config["USER_CACHE_TTL"]
+
+  for model in USER_MODELS.values():
+    for name in ("after_update", "after_delete"):
+      if not event.contains(model, name, _queue_invalidation):
+        event.listen(model, name, _queue_invalidation)
+
+  if not event.contains(Session, "after_commit", _flush_invalidations):
+    event.listen(Session, "after_commit", _flush_invalidations)
+    event.listen(Session, "after_soft_rollback", _drop_invalidations)
@@ -0,0 +1,67 @@
+from flask import current_app, g, request, session
+from flask_login import current_user
+from Admin.routes import cache
+import time, uuid
+
+CLIENT_VIEW_TIMEOUT = 5 * 60
+
+def tag_key(tag):
+  return f"tag:{tag}"
+
+def tag_version(tag):
+  """Current version of a tag, created on first use; deleting it orphans every entry built on it"""
+  key = tag_key(tag)
+  version = cache.get(key)
+  if version is None:
+    # add() keeps the first version when concurrent requests race to create it;
+    # the creation time tells how recently the tag was invalidated
+    cache.add(key, f"{time.time():.3f}-{uuid.uuid4().hex}", timeout=0)
+    version = cache.get(key)
+  return version
+
+def invalidate_tags(*tags):
+  cache.delete_many(*[tag_key(tag) for tag in tags])
+
+def client_tag(client_id):
+  return f"client:{client_id}"
+
+def invalidate_client_views(client_id):
+  """Drop every cached client-portal page of a client, called after writes to their cases"""
+  invalidate_tags(client_tag(client_id))
+
+def _client_view_key(*args, **kwargs):
+  # From the matched URL rather than the call, so however a wrapper passes the
+  # arguments on, two different pages can never share a key
+  view_args = ":".join(f"{name}={value}" for name, value in sorted((request.view_args or {}).items()))
+  return f"view:{request.endpoint}:{current_user.id}:{view_args}:{tag_version(client_tag(current_user.id))}"
+
+def _has_flashes():
+  # The page would bake the pending messages into the cached copy
+  return bool(session.get("_flashes"))
+
+def _replica_may_be_stale():
+  """
+  A page read from a replica within REPLICA_MAX_LAG of an invalidation may predate
+  the write behind it, and caching it would keep that for the whole timeout.
+  """
+  if not g.get("replica_used"):
+    return False
+  created, _, _ = tag_version(client_tag(current_user.id)).partition("-")
+  try:
+    return time.time() - float(created) < current_app.config["REPLICA_MAX_LAG"]
+  except ValueError:
+    return False
+
+def cached_client_view(timeout=CLIENT_VIEW_TIMEOUT):
+  """
+  Cache a client-portal page per client and view arguments under the client's tag.
+  Only rendered pages are stored, redirects from error paths are not, nor pages a
+  lagging replica may have rendered from before the last invalidation.
+  Signed file links reused for 45 minutes stay valid well past the timeout.
+  """
+  return cache.cached(
+    timeout=timeout,
+    make_cache_key=_client_view_key,
+    unless=_has_flashes,
+    response_filter=lambda rv: isinstance(rv, str) and not _replica_may_be_stale(),
+  )
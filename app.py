@@ -1,23 +1,39 @@
 from flask import Flask, flash, abort
 from flask_login import login_manager, LoginManager
-from flask_migrate import Migrate
-from Admin.routes import admin_bp
+from Admin.routes import admin_bp, cache, redis_client
 from Case.routes import case_bp
+from Case.storage import storage
 from Dashboard.routes import dashboard_bp
 from Clients.routes import client_bp
 from Auth.routes import auth_bp
 from Errors.handlers import errors_bp
 from Models.base_model import db
 from Models.users import Lawyers, Client
+from Models.unique_id import UniqueIdBlock
+from Utils.query_stats import init_query_stats
+from Utils.replicas import init_replicas
+from Utils.user_cache import init_user_cache, load_user_cached
+from Utils.token_store import init_token_store
 from config import Config
 import os
 
-def create_app():
+def create_app(config_class=Config):
   app = Flask(__name__)
-  app.config.from_object(Config)
+  app.config.from_object(config_class)
 
   db.init_app(app)
-  migrate = Migrate(app, db)
+  # Flask-Migrate imports alembic, which only the flask db commands need
+  if os.environ.get("FLASK_RUN_FROM_CLI") == "true":
+    from flask_migrate import Migrate
+    migrate = Migrate(app, db)
+  cache.init_app(app)
+  if app.config.get("REDIS_URL"):
+    redis_client.init_app(app)
+  init_token_store(app)
+  init_query_stats(app)
+  init_replicas(app)
+  init_user_cache(app)
+  storage.init_app(app)
 
   app.register_blueprint(case_bp)
   app.register_blueprint(admin_bp)
@@ -39,7 +55,7 @@ def create_app():
   @login_manager.user_loader
   def load_user(user_id):
     try:
-      return Lawyers.query.filter_by(unique_id=user_id).first() or Client.query.filter_by(unique_id=user_id).first()
+      return load_user_cached(user_id)
     except:
       flash("Unable to load user", category="danger")
       abort(500)
@@ -49,5 +65,4 @@ def create_app():
 app = create_app()
 
 if __name__ == "__main__":
-  app = create_app()
   app.run(debug=True)
@@ -0,0 +1,134 @@
+"""
+Cold start cost of a worker: import time of app.py and the time to its first response.
+
+  python benchmarks/import_time.py
+  python benchmarks/import_time.py --output before.json
+  python benchmarks/import_time.py --compare before.json      # after a change
+
+Each run is a fresh interpreter, like a new gunicorn worker. Import times come
+from `python -X importtime -c "import app"`, summed per top-level package. The
+boot time covers importing app.py (which builds the app) and serving GET
+/auth/login through the test client. DEFERRED lists the modules that must only
+load when a request needs them; the report flags any of them imported at boot.
+"""
+import argparse, json, os, statistics, subprocess, sys, tempfile
+from collections import defaultdict
+
+ROOT = os.path.dirname(os.path.dirname(os.path.abspath(__file__)))
+DEFERRED = ("boto3", "pandas", "alembic", "flask_migrate", "reportlab", "openpyxl")
+BOOT = """
+import json, sys, time
+start = time.perf_counter()
+import app
+imported = time.perf_counter()
+app.app.test_client().get("/auth/login")
+served = time.perf_counter()
+print(json.dumps({
+  "import_ms": (imported - start) * 1000, "first_request_ms": (served - imported) * 1000,
+  "loaded": sorted({name.split(".")[0] for name in sys.modules} & set(%r)),
+}))
+""" % (DEFERRED,)
+
+def environment():
+  env = dict(os.environ)
+  # app.py builds an app at import time, so the database has to be chosen first
+  env.setdefault("DATABASE_URL", "sqlite:///" + os.path.join(tempfile.mkdtemp(), "import_time.db"))
+  env.setdefault("SECRET_KEY", "benchmark")
+  # One process, so tokens need no shared store unless Redis is configured
+  env.setdefault("TOKEN_STORE", "redis" if env.get("REDIS_URL") else "memory")
+  return env
+
+def parse_importtime(stderr):
+  """{module: (self us, cumulative us)} from -X importtime output"""
+  modules = {}
+  for line in stderr.splitlines():
+    if not line.startswith("import time:") or "self [us]" in line:
+      continue
+    own, cumulative, name = line[len("import time:"):].split("|")
+    modules[name.strip()] = (int(own), int(cumulative))
+  return modules
+
+def import_run(env):
+  result = subprocess.run(
+    [sys.executable, "-X", "importtime", "-c", "import app"], cwd=ROOT, env=env, capture_output=True, text=True,
+  )
+  if result.returncode != 0:
+    raise RuntimeError(result.stderr[-2000:])
+  return parse_importtime(result.stderr)
+
+def boot_run(env):
+  result = subprocess.run([sys.executable, "-c", BOOT], cwd=ROOT, env=env, capture_output=True, text=True)
+  if result.returncode != 0:
+    raise RuntimeError(result.stderr[-2000:])
+  return json.loads(result.stdout.strip().splitlines()[-1])
+
+def measure(runs):
+  env = environment()
+  totals, packages = [], defaultdict(list)
+  for _ in range(runs):
+    modules = import_run(env)
+    totals.append(modules["app"][1] / 1000)
+    per_package = defaultdict(int)
+    for name, (own, _) in modules.items():
+      per_package[name.split(".")[0]] += own
+    for package, own in per_package.items():
+      packages[package].append(own / 1000)
+
+  boots = [boot_run(env) for _ in range(runs)]
+  return {
+    "import_ms": round(statistics.median(totals), 1),
+    "boot_import_ms": round(statistics.median(boot["import_ms"] for boot in boots), 1),
+    "first_request_ms": round(statistics.median(boot["first_request_ms"] for boot in boots), 1),
+    # Packages missing from a run count as 0 there
+    "packages": {
+      package: round(statistics.median(times + [0.0] * (runs - len(times))), 1)
+      for package, times in sorted(packages.items(), key=lambda item: -sum(item[1]))
+    },
+    "deferred_loaded": sorted({name for boot in boots for name in boot["loaded"]}),
+  }
+
+def git_commit():
+  try:
+    return subprocess.run(["git", "rev-parse", "--short", "HEAD"], cwd=ROOT, capture_output=True, text=True, check=True).stdout.strip()
+  except (OSError, subprocess.CalledProcessError):
+    return None
+
+def print_report(report, previous=None, top=20):
+  delta = lambda key: f" ({report[key] - previous[key]:+.1f})" if previous and key in previous else ""
+  print(f"commit {report['commit']}, {report['runs']} runs, {report['python']}")
+  print(f"import app (-X importtime) {report['import_ms']:.1f} ms{delta('import_ms')}")
+  print(f"import app (wall clock)    {report['boot_import_ms']:.1f} ms{delta('boot_import_ms')}")
+  print(f"first request              {report['first_request_ms']:.1f} ms{delta('first_request_ms')}")
+  print(f"\n{'package':<28} {'self ms':>9}")
+  before = (previous or {}).get("packages", {})
+  for package, ms in list(report["packages"].items())[:top]:
+    change = f"   {ms - before.get(package, 0.0):+.1f}" if previous else ""
+    print(f"{package:<28} {ms:>9.1f}{change}")
+  if previous:
+    dropped = [package for package in before if package not in report["packages"]]
+    if dropped:
+      print(f"\nno longer imported at boot: {', '.join(dropped)}")
+  if report["deferred_loaded"]:
+    print(f"\nimported at boot but should be deferred: {', '.join(report['deferred_loaded'])}")
+
+def main():
+  parser = argparse.ArgumentParser(description=__doc__.strip().splitlines()[0])
+  parser.add_argument("--runs", type=int, default=5)
+  parser.add_argument("--top", type=int, default=20, help="packages to list")
+  parser.add_argument("--output", help="write the results to this JSON file")
+  parser.add_argument("--compare", help="JSON file of an earlier run to print the differences against")
+  args = parser.parse_args()
+
+  report = {"commit": git_commit(), "runs": args.runs, "python": sys.version.split()[0], **measure(args.runs)}
+  previous = None
+  if args.compare:
+    with open(args.compare) as file:
+      previous = json.load(file)
+  print_report(report, previous, args.top)
+
+  if args.output:
+    with open(args.output, "w") as file:
+      json.dump(report, file, indent=2)
+
+if __name__ == "__main__":
+  main()
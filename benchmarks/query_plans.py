@@ -0,0 +1,114 @@
+"""
+Query plans of the hot route queries without and with the route indexes
+(migration 7b41c9e2f3a8).
+
+  python benchmarks/query_plans.py                      # throwaway SQLite database
+  DATABASE_URL=postgresql://... python benchmarks/query_plans.py --lawyers 50
+
+Never point it at a database holding real data: the tables are dropped and
+recreated. Prints each query's plan and median time before and after.
+"""
+import argparse, os, statistics, sys, tempfile, time
+from datetime import date
+
+sys.path.insert(0, os.path.dirname(os.path.dirname(os.path.abspath(__file__))))
+# app.py builds an app at import time, so the database has to be chosen first
+os.environ.setdefault("DATABASE_URL", "sqlite:///" + os.path.join(tempfile.mkdtemp(), "query_plans.db"))
+os.environ.setdefault("SECRET_KEY", "benchmark")
+# One process, so tokens need no shared store unless Redis is configured
+os.environ.setdefault("TOKEN_STORE", "redis" if os.environ.get("REDIS_URL") else "memory")
+
+from sqlalchemy import select, text, desc
+from app import create_app
+from seed import seed_database
+from Models.base_model import db
+from Models.users import Client
+from Models.case import Case, CaseNote, CaseFiles
+from Models.event import Event
+from Models.payment import Payment
+
+ROUTE_INDEXES = (
+  "ix_cases_lawyer_id_opened_date", "ix_cases_lawyer_id_alias", "ix_cases_client_id_alias",
+  "ix_clients_lawyer_id_created_at", "ix_case_notes_case_id_created_at", "ix_case_files_case_note_id",
+  "ix_payments_case_id_date_received", "ix_events_case_id_event_date",
+)
+
+def route_queries(lawyer_id, client_id, case_id, alias):
+  """The statements behind the dashboard, case detail and calendar routes"""
+  today = date.today()
+  return {
+    "case_detail lookup": select(Case).where(Case.alias == alias, Case.lawyer_id == lawyer_id).limit(1),
+    "client_case_detail lookup": select(Case).where(Case.alias == alias, Case.client_id == client_id).limit(1),
+    "dashboard cases page": select(Case).where(Case.lawyer_id == lawyer_id).order_by(desc(Case.opened_date), desc(Case.id)).limit(26),
+    "dashboard clients page": select(Client).where(Client.lawyer_id == lawyer_id).order_by(desc(Client.created_at), desc(Client.id)).limit(26),
+    "case notes": select(CaseNote).where(CaseNote.case_id == case_id).order_by(desc(CaseNote.created_at)),
+    "case payments": select(Payment).where(Payment.case_id == case_id).order_by(desc(Payment.date_received)),
+    "upcoming events": select(Event).where(Event.case_id == case_id, Event.event_date >= today).order_by(Event.event_date, Event.event_time).limit(5),
+    "case files": select(CaseFiles).join(CaseNote, CaseFiles.case_note_id == CaseNote.id).where(CaseNote.case_id == case_id).order_by(CaseFiles.id),
+    "calendar feed": select(Event, Case.alias).join(Case, Event.case_id == Case.id).where(Case.lawyer_id == lawyer_id, Event.event_date >= today).order_by(Event.event_date, Event.event_time, Event.id),
+  }
+
+def first_case():
+  """(lawyer id, client id, case id, case alias) of the first seeded case, to query for"""
+  case = db.session.execute(select(Case).order_by(Case.id).limit(1)).scalar_one()
+  return case.lawyer_id, case.client_id, case.id, case.alias
+
+def explain(connection, statement):
+  sql = str(statement.compile(connection, compile_kwargs={"literal_binds": True}))
+  if connection.dialect.name == "postgresql":
+    return [row[0] for row in connection.execute(text(f"EXPLAIN (ANALYZE, BUFFERS) {sql}"))]
+  return [row[-1] for row in connection.execute(text(f"EXPLAIN QUERY PLAN {sql}"))]
+
+def timed(connection, statement, repeat):
+  timings = []
+  for _ in range(repeat):
+    start = time.perf_counter()
+    connection.execute(statement).all()
+    timings.append((time.perf_counter() - start) * 1000)
+  return statistics.median(timings)
+
+def report(queries, repeat):
+  results = {}
+  with db.engine.connect() as connection:
+    if connection.dialect.name == "postgresql":
+      connection.execute(text("ANALYZE"))
+    for name, statement in queries.items():
+      results[name] = (explain(connection, statement), timed(connection, statement, repeat))
+  return results
+
+def main():
+  parser = argparse.ArgumentParser(description=__doc__.strip().splitlines()[0])
+  parser.add_argument("--lawyers", type=int, default=20)
+  parser.add_argument("--clients", type=int, default=200, help="clients per lawyer")
+  parser.add_argument("--cases", type=int, default=2, help="cases per client")
+  parser.add_argument("--rows", type=int, default=10, help="notes, payments and events per case")
+  parser.add_argument("--repeat", type=int, default=20)
+  args = parser.parse_args()
+
+  with create_app().app_context():
+    db.drop_all()
+    db.create_all()
+    started = time.perf_counter()
+    seed_database(
+      args.lawyers, args.clients, args.cases, notes_per_case=args.rows, payments_per_case=args.rows,
+      events_per_case=args.rows, rounds=4,
+    )
+    queries = route_queries(*first_case())
+    print(f"Seeded {db.engine.url.render_as_string()} in {time.perf_counter() - started:.1f}s")
+
+    indexes = [index for table in db.metadata.tables.values() for index in table.indexes if index.name in ROUTE_INDEXES]
+    for index in indexes:
+      index.drop(db.engine)
+    before = report(queries, args.repeat)
+    for index in indexes:
+      index.create(db.engine)
+    after = report(queries, args.repeat)
+
+  for name in queries:
+    (plan_before, ms_before), (plan_after, ms_after) = before[name], after[name]
+    print(f"\n== {name}: {ms_before:.2f} ms -> {ms_after:.2f} ms")
+    print("  before: " + "\n          ".join(plan_before))
+    print("  after:  " + "\n          ".join(plan_after))
+
+if __name__ == "__main__":
+  main()
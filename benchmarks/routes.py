@@ -0,0 +1,251 @@
+"""
+Latency and query counts of the main routes against a seeded database.
+
+  python benchmarks/routes.py                                   # throwaway SQLite database
+  python benchmarks/routes.py --output before.json
+  python benchmarks/routes.py --compare before.json             # after a change
+  DATABASE_URL=postgresql+psycopg2://... python benchmarks/routes.py --lawyers 20
+  CACHE_TYPE=NullCache python benchmarks/routes.py              # without the client view cache
+
+Never point it at a database holding real data: the tables are dropped and
+recreated and seeded with seed.py. Requests go through the Flask test client,
+so the numbers cover routing, queries and template rendering but not the
+network or the WSGI server. Query counts come from the query_stats_recorded
+signal of Utils/query_stats.py, sent once the body is consumed, so they include
+the queries of streamed bodies. The write routes add rows on every run, so keep the
+repeat count the same when comparing runs; those in PERSISTS are reported as
+failing unless every request stored its row.
+"""
+import argparse, json, os, statistics, subprocess, sys, tempfile, time
+from datetime import date, timedelta
+
+ROOT = os.path.dirname(os.path.dirname(os.path.abspath(__file__)))
+sys.path.insert(0, ROOT)
+# app.py builds an app at import time, so the database has to be chosen first
+os.environ.setdefault("DATABASE_URL", "sqlite:///" + os.path.join(tempfile.mkdtemp(), "routes.db"))
+os.environ.setdefault("SECRET_KEY", "benchmark")
+# One process, so tokens need no shared store unless Redis is configured
+os.environ.setdefault("TOKEN_STORE", "redis" if os.environ.get("REDIS_URL") else "memory")
+# Download links of the seeded files are presigned locally, no request reaches S3
+for name, value in (("bucket_name", "benchmark"), ("region", "us-east-1"), ("aws_access_key", "benchmark"), ("aws_secret_key", "benchmark")):
+  os.environ.setdefault(name, value)
+os.environ["QUERY_STATS_ENABLED"] = "true"
+os.environ.setdefault("QUERY_STATS_MAX_QUERIES", "1000")
+os.environ.setdefault("QUERY_STATS_MAX_DURATION_MS", "10000")
+os.environ.setdefault("QUERY_STATS_MAX_REPEATS", "1000")
+
+from flask import url_for
+from sqlalchemy import func, select
+from app import create_app
+from seed import seed_database
+from Models.base_model import db
+from Models.users import Lawyers, Client
+from Models.case import Case, CaseNote
+from Models.payment import Payment
+from Models.event import Event
+from Dashboard.routes import calendar_serializer
+from Utils.query_stats import query_stats_recorded
+
+BLUEPRINTS = ("dashboard", "case", "client", "auth")
+# Endpoints left out on purpose and why
+SKIPPED = {
+  "case.case_statement": "renders in the statement worker pool, time it with the workers running",
+  "case.presign_uploads": "needs an S3 bucket",
+  "case.finalize_uploads": "needs an S3 bucket",
+  "case.remove_case_note": "deletes the note the other scenarios read",
+  "case.close_case": "changes the case the other scenarios read",
+  "client.delete_client": "deletes the client the other scenarios read",
+  "auth.reset_password_request": "sends mail",
+  "auth.reset_password": "needs a mailed token",
+  "auth.logout": "ends the benchmark session",
+}
+# Write scenarios and the row each request must add to the target case
+PERSISTS = {"add payment": Payment, "add event": Event}
+
+def scenarios(target):
+  """
+  (name, session, method, endpoint, url arguments, form data, headers). `session`
+  is "lawyer", "client" or "anonymous"; anonymous requests get a fresh session.
+  """
+  today = date.today()
+  return [
+    ("dashboard", "lawyer", "GET", "dashboard.index", {}, None, {}),
+    ("dashboard clients page", "lawyer", "GET", "dashboard.api_dashboard_page", {"tab": "clients"}, None, {}),
+    ("dashboard cases page", "lawyer", "GET", "dashboard.api_dashboard_page", {"tab": "cases"}, None, {}),
+    ("export cases csv", "lawyer", "GET", "dashboard.export_cases", {"export_format": "csv"}, None, {}),
+    ("export payments csv", "lawyer", "GET", "dashboard.export_payments", {"export_format": "csv"}, None, {}),
+    ("calendar feed", "anonymous", "GET", "dashboard.calendar_feed", {"token": target["calendar_token"]}, None, {}),
+    ("calendar feed, not modified", "anonymous", "GET", "dashboard.calendar_feed", {"token": target["calendar_token"]}, None, {"If-None-Match": "<etag>"}),
+    ("case detail", "lawyer", "GET", "case.case_detail", {"case_id": target["case_alias"]}, None, {}),
+    ("case detail, not modified", "lawyer", "GET", "case.case_detail", {"case_id": target["case_alias"]}, None, {"If-None-Match": "<etag>"}),
+    ("new case form", "lawyer", "GET", "case.add_case", {"client_id": target["client_id"]}, None, {}),
+    ("edit case form", "lawyer", "GET", "case.edit_case", {"case_id": target["case_id"]}, None, {}),
+    ("edit note form", "lawyer", "GET", "case.edit_case_note", {"case_id": target["case_alias"], "case_note_id": target["note_id"]}, None, {}),
+    ("case stats api", "lawyer", "GET", "case.api_case_stats", {}, None, {}),
+    ("upcoming events api", "lawyer", "GET", "case.api_upcoming_events", {}, None, {}),
+    ("add note", "lawyer", "POST", "case.add_note", {"case_id": target["case_id"]}, {"content": "Benchmark note", "is_internal": "True"}, {}),
+    ("add payment", "lawyer", "POST", "case.add_payment", {"case_id": target["case_id"]}, {"amount": "1000", "payment_method": "bank", "reference": "BENCH", "date_received": today.isoformat()}, {}),
+    ("add event", "lawyer", "POST", "case.add_event", {"case_id": target["case_id"]}, {"title": "Benchmark hearing", "event_date": (today + timedelta(days=7)).isoformat(), "event_time": "09:00", "event_type": "hearing"}, {}),
+    ("client profile", "lawyer", "GET", "client.client_profile", {"client_id": target["client_id"]}, None, {}),
+    ("edit client form", "lawyer", "GET", "client.edit_client", {"client_id": target["client_id"]}, None, {}),
+    ("add client form", "lawyer", "GET", "client.add_client", {}, None, {}),
+    ("import clients form", "lawyer", "GET", "client.import_client_list", {}, None, {}),
+    ("client search api", "lawyer", "GET", "client.api_search", {"q": target["search"]}, None, {}),
+    ("client dashboard", "client", "GET", "dashboard.client_index", {}, None, {}),
+    ("client case detail", "client", "GET", "case.client_case_detail", {"case_id": target["case_alias"]}, None, {}),
+    ("login form", "anonymous", "GET", "auth.login", {}, None, {}),
+    ("login", "anonymous", "POST", "auth.login", {}, {"email": target["lawyer_email"], "password": "password"}, {}),
+    ("register form", "anonymous", "GET", "auth.register", {}, None, {}),
+  ]
+
+def pick_target():
+  """The first seeded lawyer, their first client and that client's first case"""
+  lawyer = db.session.scalars(select(Lawyers).where(Lawyers.email == "lawyer0@example.com")).one()
+  client = db.session.scalars(select(Client).where(Client.lawyer_id == lawyer.id).order_by(Client.id).limit(1)).one()
+  case = db.session.scalars(select(Case).where(Case.client_id == client.id).order_by(Case.id).limit(1)).one()
+  note = db.session.scalars(select(CaseNote).where(CaseNote.case_id == case.id, CaseNote.is_editable == True).limit(1)).one()
+  return {
+    "lawyer_email": lawyer.email, "client_email": client.email, "client_id": client.unique_id,
+    "case_id": case.unique_id, "case_pk": case.id, "case_alias": case.alias, "note_id": note.unique_id,
+    "search": client.last_name[:3], "calendar_token": calendar_serializer().dumps(lawyer.get_id()),
+  }
+
+def row_count(app, model, case_id):
+  with app.app_context():
+    return db.session.scalar(select(func.count()).select_from(model).where(model.case_id == case_id))
+
+def login(app, email):
+  http = app.test_client()
+  response = http.post("/auth/login", data={"email": email, "password": "password"})
+  if response.status_code != 302:
+    raise RuntimeError(f"Could not log in as {email}")
+  return http
+
+def percentile(values, fraction):
+  values = sorted(values)
+  return values[min(len(values) - 1, int(round(fraction * (len(values) - 1))))]
+
+def run(app, target, repeat, warmup):
+  sessions = {"lawyer": login(app, target["lawyer_email"]), "client": login(app, target["client_email"])}
+  results, recorded = {}, []
+  query_stats_recorded.connect(lambda sender, stats, **extra: recorded.append(stats), app, weak=False)
+  for name, session, method, endpoint, arguments, data, headers in scenarios(target):
+    with app.test_request_context():
+      url = url_for(endpoint, **arguments)
+    http = sessions.get(session) or app.test_client()
+    if headers.get("If-None-Match") == "<etag>":
+      headers = dict(headers, **{"If-None-Match": http.get(url).headers.get("ETag", "")})
+
+    timings, queries, statuses, errors = [], [], set(), set()
+    model = PERSISTS.get(name)
+    rows_before = model and row_count(app, model, target["case_pk"])
+    for attempt in range(warmup + repeat):
+      recorded.clear()
+      if session == "anonymous":
+        http = app.test_client()
+      start = time.perf_counter()
+      response = http.open(url, method=method, data=data, headers=headers)
+      response.get_data()
+      response.close()
+      elapsed = (time.perf_counter() - start) * 1000
+      # Flashes left by redirects would otherwise pile up and disable the conditional views
+      with http.session_transaction() as flask_session:
+        flashes = flask_session.pop("_flashes", [])
+      # Routes report failures as danger flashes behind a redirect, not as error statuses
+      errors.update(message.splitlines()[0] for category, message in flashes if category == "danger")
+      if attempt < warmup:
+        continue
+      timings.append(elapsed)
+      statuses.add(response.status_code)
+      queries.append(recorded.pop().count if recorded else None)
+
+    if model:
+      added = row_count(app, model, target["case_pk"]) - rows_before
+      if added != warmup + repeat:
+        errors.add(f"{added} of {warmup + repeat} requests stored a {model.__name__}")
+
+    counted = [count for count in queries if count is not None]
+    results[name] = {
+      "endpoint": endpoint, "method": method, "status": sorted(statuses),
+      "p50_ms": round(statistics.median(timings), 2), "p95_ms": round(percentile(timings, 0.95), 2),
+      "queries": statistics.median(counted) if counted else None,
+      "errors": sorted(errors),
+    }
+  return results
+
+def uncovered(app, results):
+  covered = {result["endpoint"] for result in results.values()}
+  return sorted(
+    rule.endpoint for rule in app.url_map.iter_rules()
+    if rule.endpoint.split(".")[0] in BLUEPRINTS and rule.endpoint not in covered and rule.endpoint not in SKIPPED
+  )
+
+def git_commit():
+  try:
+    return subprocess.run(["git", "rev-parse", "--short", "HEAD"], cwd=ROOT, capture_output=True, text=True, check=True).stdout.strip()
+  except (OSError, subprocess.CalledProcessError):
+    return None
+
+def print_report(report, previous=None):
+  print(f"commit {report['commit']}, {report['dialect']}, cache {report['cache']}, seed {report['seed']}")
+  print(f"{'route':<32} {'status':>7} {'p50 ms':>9} {'p95 ms':>9} {'queries':>8}")
+  for name, result in report["routes"].items():
+    line = f"{name:<32} {','.join(map(str, result['status'])):>7} {result['p50_ms']:>9.2f} {result['p95_ms']:>9.2f} {str(result['queries']):>8}"
+    before = (previous or {}).get("routes", {}).get(name)
+    if before:
+      line += f"   p50 {result['p50_ms'] - before['p50_ms']:+.2f} ms"
+      if result["queries"] is not None and before["queries"] is not None:
+        line += f", queries {result['queries'] - before['queries']:+g}"
+    print(line)
+    for error in result.get("errors", []):
+      print(f"{'':<34}error: {error[:100]}")
+  if previous:
+    print(f"compared with commit {previous.get('commit')}, {previous.get('dialect')}")
+  for endpoint, reason in SKIPPED.items():
+    print(f"skipped {endpoint}: {reason}")
+  for endpoint in report["uncovered"]:
+    print(f"not covered {endpoint}")
+
+def main():
+  parser = argparse.ArgumentParser(description=__doc__.strip().splitlines()[0])
+  parser.add_argument("--lawyers", type=int, default=5)
+  parser.add_argument("--clients", type=int, default=50, help="clients per lawyer")
+  parser.add_argument("--cases", type=int, default=2, help="cases per client")
+  parser.add_argument("--notes", type=int, default=8, help="notes per case")
+  parser.add_argument("--seed", type=int, default=0)
+  parser.add_argument("--repeat", type=int, default=30)
+  parser.add_argument("--warmup", type=int, default=3)
+  parser.add_argument("--output", help="write the results to this JSON file")
+  parser.add_argument("--compare", help="JSON file of an earlier run to print the differences against")
+  args = parser.parse_args()
+
+  app = create_app()
+  app.config.update(TESTING=True, WTF_CSRF_ENABLED=False)
+  seed = {"lawyers": args.lawyers, "clients_per_lawyer": args.clients, "cases_per_client": args.cases, "notes_per_case": args.notes, "seed": args.seed}
+  with app.app_context():
+    db.drop_all()
+    db.create_all()
+    started = time.perf_counter()
+    # Few bcrypt rounds so the login scenario measures the route rather than the hash
+    seed_database(**seed, rounds=4)
+    print(f"Seeded {db.engine.url.render_as_string()} in {time.perf_counter() - started:.1f}s")
+    target = pick_target()
+    dialect = db.engine.dialect.name
+
+  results = run(app, target, args.repeat, args.warmup)
+  report = {
+    "commit": git_commit(), "dialect": dialect, "cache": app.config["CACHE_TYPE"], "seed": seed,
+    "repeat": args.repeat, "routes": results, "uncovered": uncovered(app, results),
+  }
+  previous = None
+  if args.compare:
+    with open(args.compare) as file:
+      previous = json.load(file)
+  print_report(report, previous)
+
+  if args.output:
+    with open(args.output, "w") as file:
+      json.dump(report, file, indent=2)
+
+if __name__ == "__main__":
+  main()
@@ -1,4 +1,5 @@
 from dotenv import load_dotenv
+from Utils.db_pool import engine_options
 import os
 
 load_dotenv()
@@ -6,4 +7,54 @@ load_dotenv()
 class Config:
   SQLALCHEMY_DATABASE_URI = os.environ.get('DATABASE_URL')
   SQLALCHEMY_TRACK_MODIFICATIONS = False
+  # Connection pool of each worker process (Utils/db_pool.py). Behind PgBouncer in
+  # transaction pooling mode set DATABASE_POOL_MODE=transaction.
+  DATABASE_POOL_SIZE = int(os.environ.get("DATABASE_POOL_SIZE", 5))
+  DATABASE_MAX_OVERFLOW = int(os.environ.get("DATABASE_MAX_OVERFLOW", 5))
+  DATABASE_POOL_TIMEOUT = int(os.environ.get("DATABASE_POOL_TIMEOUT", 10))
+  DATABASE_POOL_RECYCLE = int(os.environ.get("DATABASE_POOL_RECYCLE", 1800))
+  DATABASE_POOL_PRE_PING = os.environ.get("DATABASE_POOL_PRE_PING", "True").lower() == "true"
+  DATABASE_POOL_MODE = os.environ.get("DATABASE_POOL_MODE", "session")
+  DATABASE_CONNECT_TIMEOUT = int(os.environ.get("DATABASE_CONNECT_TIMEOUT", 10))
+  DATABASE_POOL_SLOW_CHECKOUT_MS = int(os.environ.get("DATABASE_POOL_SLOW_CHECKOUT_MS", 100))
+  SQLALCHEMY_ENGINE_OPTIONS = engine_options(
+    SQLALCHEMY_DATABASE_URI, DATABASE_POOL_SIZE, DATABASE_MAX_OVERFLOW, DATABASE_POOL_TIMEOUT,
+    DATABASE_POOL_RECYCLE, DATABASE_POOL_PRE_PING, DATABASE_POOL_MODE, DATABASE_CONNECT_TIMEOUT,
+    DATABASE_POOL_SLOW_CHECKOUT_MS,
+  )
+  # Read replicas for views marked with replica_reads (Utils/replicas.py), comma separated
+  DATABASE_REPLICA_URLS = [url.strip() for url in os.environ.get("DATABASE_REPLICA_URLS", "").split(",") if url.strip()]
+  # Seconds a user's reads stay on the primary after they write
+  REPLICA_STICKY_SECONDS = int(os.environ.get("REPLICA_STICKY_SECONDS", 10))
+  REPLICA_CHECK_INTERVAL = int(os.environ.get("REPLICA_CHECK_INTERVAL", 5))
+  REPLICA_RETRY_AFTER = int(os.environ.get("REPLICA_RETRY_AFTER", 30))
+  REPLICA_MAX_LAG = int(os.environ.get("REPLICA_MAX_LAG", 5))
   SECRET_KEY = os.environ.get("SECRET_KEY")
+  REDIS_URL = os.environ.get("REDIS_URL")
+  # RedisCache shares entries and invalidations across workers; SimpleCache or NullCache locally
+  CACHE_TYPE = os.environ.get("CACHE_TYPE", "RedisCache" if REDIS_URL else "SimpleCache")
+  CACHE_REDIS_URL = os.environ.get("CACHE_REDIS_URL", REDIS_URL)
+  CACHE_KEY_PREFIX = os.environ.get("CACHE_KEY_PREFIX", "lawfirm:")
+  CACHE_DEFAULT_TIMEOUT = int(os.environ.get("CACHE_DEFAULT_TIMEOUT", 300))
+  # "redis" (needs REDIS_URL) or "memory", for a single process only
+  TOKEN_STORE = os.environ.get("TOKEN_STORE", "redis")
+  PASSWORD_RESET_TTL = int(os.environ.get("PASSWORD_RESET_TTL", 60 * 60))
+  STATEMENT_WORKERS = int(os.environ.get("STATEMENT_WORKERS", 2))
+  MAX_UPLOAD_SIZE = int(os.environ.get("MAX_UPLOAD_SIZE", 50 * 1024 * 1024))
+
+  # unique_id allocation (Models/unique_id.py); changing the key reshuffles future ids only
+  UNIQUE_ID_KEY = os.environ.get("UNIQUE_ID_KEY", "lawfirm-unique-ids")
+  UNIQUE_ID_BLOCK_SIZE = int(os.environ.get("UNIQUE_ID_BLOCK_SIZE", 1000))
+
+  # User loader cache (Utils/user_cache.py); the local TTL bounds staleness across workers
+  USER_CACHE_SIZE = int(os.environ.get("USER_CACHE_SIZE", 1024))
+  USER_CACHE_TTL = int(os.environ.get("USER_CACHE_TTL", 30))
+  USER_CACHE_REDIS = os.environ.get("USER_CACHE_REDIS", "False").lower() == "true"
+  USER_CACHE_REDIS_TTL = int(os.environ.get("USER_CACHE_REDIS_TTL", 300))
+
+  # Per-request query instrumentation (Utils/query_stats.py)
+  QUERY_STATS_ENABLED = os.environ.get("QUERY_STATS_ENABLED", "False").lower() == "true"
+  QUERY_STATS_RAISE = os.environ.get("QUERY_STATS_RAISE", "False").lower() == "true"
+  QUERY_STATS_MAX_QUERIES = int(os.environ.get("QUERY_STATS_MAX_QUERIES", 20))
+  QUERY_STATS_MAX_DURATION_MS = int(os.environ.get("QUERY_STATS_MAX_DURATION_MS", 250))
+  QUERY_STATS_MAX_REPEATS = int(os.environ.get("QUERY_STATS_MAX_REPEATS", 5))
@@ -4,6 +4,7 @@ from Models.users import *
 from Models.case import *
 from Models.event import *
 from Models.payment import *
+from Models.unique_id import *
 from config import Config
 
 app = Flask(__name__)
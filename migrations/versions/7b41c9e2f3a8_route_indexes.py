@@ -0,0 +1,47 @@
+"""route indexes
+
+Composite indexes matching the predicates and sort orders of the routes:
+cases by lawyer or client and alias, the dashboard keyset pages, and each
+case's notes, payments, events and files. See benchmarks/query_plans.py.
+
+Revision ID: 7b41c9e2f3a8
+Revises: d6e2dc5aa70d
+Create Date: 2026-10-18 03:40:12.512093
+
+"""
+from alembic import op
+import sqlalchemy as sa
+
+
+# revision identifiers, used by Alembic.
+revision = '7b41c9e2f3a8'
+down_revision = 'd6e2dc5aa70d'
+branch_labels = None
+depends_on = None
+
+INDEXES = (
+    ('ix_cases_lawyer_id_opened_date', 'cases', ['lawyer_id', sa.literal_column('opened_date DESC'), sa.literal_column('id DESC')]),
+    ('ix_cases_lawyer_id_alias', 'cases', ['lawyer_id', 'alias']),
+    ('ix_cases_client_id_alias', 'cases', ['client_id', 'alias']),
+    ('ix_clients_lawyer_id_created_at', 'clients', ['lawyer_id', sa.literal_column('created_at DESC'), sa.literal_column('id DESC')]),
+    ('ix_case_notes_case_id_created_at', 'case_notes', ['case_id', sa.literal_column('created_at DESC')]),
+    ('ix_case_files_case_note_id', 'case_files', ['case_note_id']),
+    ('ix_payments_case_id_date_received', 'payments', ['case_id', sa.literal_column('date_received DESC')]),
+    ('ix_events_case_id_event_date', 'events', ['case_id', 'event_date', 'event_time']),
+)
+
+
+def upgrade():
+    # Built concurrently on PostgreSQL so writes to the tables are not blocked meanwhile
+    with op.get_context().autocommit_block():
+        for name, table, columns in INDEXES:
+            op.create_index(name, table, columns, unique=False, postgresql_concurrently=True)
+        # Superseded by ix_case_notes_case_id_created_at, no route sorts notes across cases
+        op.drop_index('ix_case_notes_created_at', table_name='case_notes', postgresql_concurrently=True)
+
+
+def downgrade():
+    with op.get_context().autocommit_block():
+        op.create_index('ix_case_notes_created_at', 'case_notes', ['created_at'], unique=False, postgresql_concurrently=True)
+        for name, table, columns in reversed(INDEXES):
+            op.drop_index(name, table_name=table, postgresql_concurrently=True)
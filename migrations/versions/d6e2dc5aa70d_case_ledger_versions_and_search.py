@@ -0,0 +1,106 @@
+"""case ledger, versions and search
+
+Schema added since the baseline: the payment ledger and version counter on
+cases, events.updated_at, the new event types, unique_id_blocks and the client
+search index.
+
+Revision ID: d6e2dc5aa70d
+Revises: d02d5b272067
+Create Date: 2026-10-18 03:09:30.205672
+
+"""
+from alembic import op
+import sqlalchemy as sa
+
+
+# revision identifiers, used by Alembic.
+revision = 'd6e2dc5aa70d'
+down_revision = 'd02d5b272067'
+branch_labels = None
+depends_on = None
+
+NEW_EVENT_TYPES = (
+    'DISCOVERY_DEADLINE', 'DEPOSITION', 'HEARING', 'TRIAL', 'MEDIATION', 'CONSULTATION', 'OTHER'
+)
+
+# Must stay identical to Models.users.client_search_document for the planner to use it
+CLIENT_SEARCH_INDEX = (
+    "CREATE INDEX ix_clients_search_trgm ON clients USING gin "
+    "(lower(first_name || ' ' || last_name || ' ' || coalesce(email, '') || ' ' || coalesce(phone, '')) gin_trgm_ops)"
+)
+
+CLIENT_FTS = (
+    "CREATE VIRTUAL TABLE IF NOT EXISTS clients_fts USING fts5(first_name, last_name, email, phone, content='clients', content_rowid='id', tokenize='trigram')",
+    "CREATE TRIGGER IF NOT EXISTS clients_fts_insert AFTER INSERT ON clients BEGIN "
+    "INSERT INTO clients_fts(rowid, first_name, last_name, email, phone) VALUES (new.id, new.first_name, new.last_name, new.email, new.phone); END",
+    "CREATE TRIGGER IF NOT EXISTS clients_fts_delete AFTER DELETE ON clients BEGIN "
+    "INSERT INTO clients_fts(clients_fts, rowid, first_name, last_name, email, phone) VALUES ('delete', old.id, old.first_name, old.last_name, old.email, old.phone); END",
+    "CREATE TRIGGER IF NOT EXISTS clients_fts_update AFTER UPDATE ON clients BEGIN "
+    "INSERT INTO clients_fts(clients_fts, rowid, first_name, last_name, email, phone) VALUES ('delete', old.id, old.first_name, old.last_name, old.email, old.phone); "
+    "INSERT INTO clients_fts(rowid, first_name, last_name, email, phone) VALUES (new.id, new.first_name, new.last_name, new.email, new.phone); END",
+    # Index the clients that already exist
+    "INSERT INTO clients_fts(clients_fts) VALUES ('rebuild')",
+)
+
+
+def upgrade():
+    dialect = op.get_bind().dialect.name
+
+    op.create_table('unique_id_blocks',
+    sa.Column('name', sa.String(length=100), nullable=False),
+    sa.Column('next_block', sa.BigInteger(), nullable=False),
+    sa.PrimaryKeyConstraint('name')
+    )
+
+    with op.batch_alter_table('cases', schema=None) as batch_op:
+        batch_op.add_column(sa.Column('amount_paid', sa.Integer(), server_default='0', nullable=False))
+        batch_op.add_column(sa.Column('payment_count', sa.Integer(), server_default='0', nullable=False))
+        batch_op.add_column(sa.Column('last_payment_date', sa.Date(), nullable=True))
+        batch_op.add_column(sa.Column('version', sa.Integer(), server_default='1', nullable=False))
+
+    # Fill the ledger from the payments recorded so far (Case.refresh_payment_summary in SQL)
+    op.execute(
+        "UPDATE cases SET "
+        "amount_paid = (SELECT COALESCE(SUM(amount), 0) FROM payments WHERE payments.case_id = cases.id), "
+        "payment_count = (SELECT COUNT(*) FROM payments WHERE payments.case_id = cases.id), "
+        "last_payment_date = (SELECT MAX(date_received) FROM payments WHERE payments.case_id = cases.id)"
+    )
+
+    with op.batch_alter_table('events', schema=None) as batch_op:
+        batch_op.add_column(sa.Column('updated_at', sa.DateTime(), nullable=True))
+    op.execute("UPDATE events SET updated_at = created_at")
+
+    if dialect == 'postgresql':
+        # New enum labels cannot be added inside a transaction block before PostgreSQL 12
+        with op.get_context().autocommit_block():
+            for value in NEW_EVENT_TYPES:
+                op.execute(f"ALTER TYPE eventtype ADD VALUE IF NOT EXISTS '{value}'")
+        op.execute("CREATE EXTENSION IF NOT EXISTS pg_trgm")
+        op.execute(CLIENT_SEARCH_INDEX)
+    elif dialect == 'sqlite':
+        # SQLite stores the enum as VARCHAR without a constraint, so only the search table is needed
+        for statement in CLIENT_FTS:
+            op.execute(statement)
+
+
+def downgrade():
+    dialect = op.get_bind().dialect.name
+
+    if dialect == 'postgresql':
+        # Enum labels cannot be dropped; the extra event types stay on the type
+        op.execute("DROP INDEX IF EXISTS ix_clients_search_trgm")
+    elif dialect == 'sqlite':
+        for trigger in ('clients_fts_insert', 'clients_fts_delete', 'clients_fts_update'):
+            op.execute(f"DROP TRIGGER IF EXISTS {trigger}")
+        op.execute("DROP TABLE IF EXISTS clients_fts")
+
+    with op.batch_alter_table('events', schema=None) as batch_op:
+        batch_op.drop_column('updated_at')
+
+    with op.batch_alter_table('cases', schema=None) as batch_op:
+        batch_op.drop_column('version')
+        batch_op.drop_column('last_payment_date')
+        batch_op.drop_column('payment_count')
+        batch_op.drop_column('amount_paid')
+
+    op.drop_table('unique_id_blocks')
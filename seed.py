@@ -0,0 +1,180 @@
+from flask import Flask
+from Models.base_model import db
+from Models.users import Lawyers, Client
+from Models.case import Case, CaseNote, CaseFiles, CaseStatus
+from Models.event import Event, EventType
+from Models.payment import Payment, PaymentType
+from Models.unique_id import UniqueIdBlock, allocate_unique_ids
+from Utils.hashing import hash_password
+from config import Config
+from sqlalchemy import insert
+from datetime import datetime, time, timedelta
+from slugify import slugify
+import argparse, random, timeit
+
+BATCH_SIZE = 5000
+
+FIRST_NAMES = ["Amina", "Brian", "Cynthia", "David", "Esther", "Faith", "George", "Halima", "Ian", "Joy", "Kevin", "Lucy", "Mercy", "Njeri", "Otieno", "Peter", "Ruth", "Samuel", "Wanjiku", "Zawadi"]
+LAST_NAMES = ["Achieng", "Barasa", "Chege", "Kamau", "Kariuki", "Kiptoo", "Mutua", "Mwangi", "Njoroge", "Ochieng", "Odhiambo", "Otieno", "Wafula", "Wambui", "Wanjala"]
+CASE_TYPES = ["Criminal Law", "Civil Litigation", "Family Law", "Corporate Law", "Real Estate", "Intellectual Property", "Employment Law", "Personal Injury", "Immigration Law", "Other"]
+COURTS = ["Milimani Law Courts", "Kibera Law Courts", "Employment and Labour Relations Court", "High Court of Kenya", "Court of Appeal"]
+CLIENT_TYPES = ["Individual", "Business", "Organization"]
+NOTE_LINES = [
+  "Called the client to go over the next steps.",
+  "Filed the pleadings and served the other side.",
+  "Reviewed the documents shared by the client.",
+  "Hearing adjourned, new date to be communicated by the court.",
+  "Drafted a settlement proposal for the client's review.",
+  "Received the opposing counsel's response.",
+]
+FILE_TYPES = ["pdf", "docx", "jpg", "png", "xlsx"]
+EVENT_TITLES = ["Mention", "Hearing", "Client meeting", "Filing deadline"]
+EVENT_TIMES = [None, time(9, 0), time(11, 30), time(14, 0)]
+
+def _insert(model, rows, returning=False):
+  """Insert rows in batches with executemany, optionally returning their ids in order"""
+  ids = []
+  for start in range(0, len(rows), BATCH_SIZE):
+    batch = rows[start:start + BATCH_SIZE]
+    if returning:
+      ids += db.session.scalars(insert(model).returning(model.id, sort_by_parameter_order=True), batch).all()
+    else:
+      db.session.execute(insert(model), batch)
+  return ids
+
+def _with_unique_ids(model, rows):
+  for row, unique_id in zip(rows, allocate_unique_ids(model, len(rows))):
+    row["unique_id"] = unique_id
+  return rows
+
+def seed_database(lawyers=5, clients_per_lawyer=50, cases_per_client=2, notes_per_case=8, payments_per_case=3,
+                  events_per_case=2, files_per_note=0.3, password="password", rounds=12, seed=0):
+  """
+  Bulk insert a synthetic firm. The same arguments always give the same data, so
+  benchmark runs are comparable. Every user's password is `password`, hashed once.
+  Returns the number of rows written per table.
+  """
+  rng = random.Random(seed)
+  now = datetime.now().replace(microsecond=0)
+  today = now.date()
+  password_hash = hash_password(password, rounds)
+  name = lambda: (rng.choice(FIRST_NAMES), rng.choice(LAST_NAMES))
+
+  lawyer_rows = []
+  for n in range(lawyers):
+    first_name, last_name = name()
+    lawyer_rows.append({
+      "first_name": first_name, "last_name": last_name, "email": f"lawyer{n}@example.com",
+      "phone": f"01{n:08d}", "password": password_hash, "role_name": "Lawyer", "is_active": True,
+      "created_at": now - timedelta(days=rng.randint(365, 3650)),
+    })
+  lawyer_ids = _insert(Lawyers, _with_unique_ids(Lawyers, lawyer_rows), returning=True)
+
+  client_rows = []
+  for lawyer_id in lawyer_ids:
+    for _ in range(clients_per_lawyer):
+      n = len(client_rows)
+      first_name, last_name = name()
+      client_rows.append({
+        "lawyer_id": lawyer_id, "first_name": first_name, "last_name": last_name,
+        "email": f"{first_name}.{last_name}.{n}@example.com".lower(), "phone": f"07{n:08d}",
+        "client_type": rng.choice(CLIENT_TYPES), "address": f"P.O. Box {rng.randint(100, 99999)}, Nairobi",
+        "password": password_hash, "role_name": "Client", "is_active": True,
+        "created_at": now - timedelta(minutes=rng.randint(0, 365 * 24 * 60)),
+      })
+  client_ids = _insert(Client, _with_unique_ids(Client, client_rows), returning=True)
+
+  case_rows, payment_rows = [], []
+  for client_id, client in zip(client_ids, client_rows):
+    for n in range(cases_per_client):
+      title = f"{client['last_name']} v {rng.choice(LAST_NAMES)} ({rng.choice(CASE_TYPES)})"
+      opened = client["created_at"] + timedelta(days=rng.randint(0, 60))
+      closed = rng.random() < 0.2
+      payments = [{
+        "amount": rng.randrange(5000, 200000, 500),
+        "payment_method": rng.choice(list(PaymentType)),
+        "reference": f"REF{rng.randint(100000, 999999)}",
+        "date_received": min((opened + timedelta(days=rng.randint(0, 120))).date(), today),
+        "created_at": now,
+      } for _ in range(payments_per_case)]
+      payment_rows.append(payments)
+      case_rows.append({
+        "title": title, "alias": f"{slugify(title)}-{len(case_rows)}", "description": f"Matter opened for {client['first_name']} {client['last_name']}.",
+        "status": CaseStatus.CLOSED if closed else CaseStatus.ACTIVE, "case_type": rng.choice(CASE_TYPES),
+        "case_number": f"E{rng.randint(100, 9999)}/{opened.year}", "court_name": rng.choice(COURTS),
+        "opposing_party": " ".join(name()), "opposing_counsel": " ".join(name()),
+        "client_id": client_id, "lawyer_id": client["lawyer_id"],
+        "opened_date": opened, "closed_date": opened + timedelta(days=rng.randint(30, 365)) if closed else None,
+        # Ledger kept in step with the payments below, as Case.record_payment would
+        "amount_paid": sum(payment["amount"] for payment in payments),
+        "payment_count": len(payments),
+        "last_payment_date": max((payment["date_received"] for payment in payments), default=None),
+      })
+  case_ids = _insert(Case, _with_unique_ids(Case, case_rows), returning=True)
+
+  note_rows, event_rows = [], []
+  for case_id, case, payments in zip(case_ids, case_rows, payment_rows):
+    for payment in payments:
+      payment["case_id"] = case_id
+    note_rows.append({"case_id": case_id, "content": "Case opened", "is_internal": False, "is_editable": False, "created_at": case["opened_date"]})
+    for n in range(notes_per_case):
+      note_rows.append({
+        "case_id": case_id, "content": rng.choice(NOTE_LINES), "is_internal": rng.random() < 0.3, "is_editable": True,
+        "created_at": case["opened_date"] + timedelta(hours=rng.randint(1, 24 * 180)),
+      })
+    for n in range(events_per_case):
+      event_date = today + timedelta(days=rng.randint(-60, 90))
+      event_rows.append({
+        "case_id": case_id, "title": f"{rng.choice(EVENT_TITLES)} {n + 1}",
+        "event_date": event_date, "event_time": rng.choice(EVENT_TIMES),
+        "event_type": rng.choice(list(EventType)), "created_at": now, "updated_at": now,
+      })
+
+  payment_rows = [payment for payments in payment_rows for payment in payments]
+  _insert(Payment, _with_unique_ids(Payment, payment_rows))
+  _insert(Event, _with_unique_ids(Event, event_rows))
+  note_ids = _insert(CaseNote, _with_unique_ids(CaseNote, note_rows), returning=True)
+
+  file_rows = []
+  for note_id, note in zip(note_ids, note_rows):
+    count = int(files_per_note) + (rng.random() < files_per_note % 1)
+    for n in range(count):
+      file_type = rng.choice(FILE_TYPES)
+      file_rows.append({"case_note_id": note_id, "file_name": f"seed/case-{note['case_id']}/note-{note_id}-{n}.{file_type}", "file_type": file_type})
+  _insert(CaseFiles, _with_unique_ids(CaseFiles, file_rows))
+
+  db.session.commit()
+  return {
+    "lawyers": len(lawyer_rows), "clients": len(client_rows), "cases": len(case_rows), "case_notes": len(note_rows),
+    "payments": len(payment_rows), "events": len(event_rows), "case_files": len(file_rows),
+  }
+
+if __name__ == "__main__":
+  app = Flask(__name__)
+  app.config.from_object(Config)
+  db.init_app(app)
+
+  parser = argparse.ArgumentParser(description="Fill the database with a synthetic law firm")
+  parser.add_argument("--lawyers", type=int, default=5)
+  parser.add_argument("--clients", type=int, default=50, help="clients per lawyer")
+  parser.add_argument("--cases", type=int, default=2, help="cases per client")
+  parser.add_argument("--notes", type=int, default=8, help="notes per case")
+  parser.add_argument("--payments", type=int, default=3, help="payments per case")
+  parser.add_argument("--events", type=int, default=2, help="events per case")
+  parser.add_argument("--files", type=float, default=0.3, help="files per note")
+  parser.add_argument("--rounds", type=int, default=12, help="bcrypt rounds of the shared password")
+  parser.add_argument("--seed", type=int, default=0, help="random seed, the same seed gives the same data")
+  parser.add_argument("--reset", action="store_true", help="drop and recreate the tables first")
+  args = parser.parse_args()
+
+  with app.app_context():
+    if args.reset:
+      db.drop_all()
+      db.create_all()
+    started = timeit.default_timer()
+    counts = seed_database(
+      args.lawyers, args.clients, args.cases, args.notes, args.payments, args.events, args.files,
+      rounds=args.rounds, seed=args.seed,
+    )
+    print(", ".join(f"{count} {table}" for table, count in counts.items()) + f" in {timeit.default_timer() - started:.1f}s")
+    print("Every seeded user signs in with the password 'password'")
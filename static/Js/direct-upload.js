@@ -0,0 +1,65 @@
+// Send note attachments straight to the bucket through presigned POST policies,
+// then submit the note with the signed upload tokens instead of the file contents.
+// If anything fails the form is submitted as a normal multipart upload.
+document.addEventListener("DOMContentLoaded", function () {
+  const form = document.getElementById("note-form");
+  if (!form || !window.fetch) return;
+
+  const fileInput = form.querySelector('input[type="file"]');
+
+  function uploadToBucket(upload, file) {
+    const data = new FormData();
+    Object.entries(upload.fields).forEach(([name, value]) => data.append(name, value));
+    data.append("file", file);
+
+    return fetch(upload.url, { method: "POST", body: data }).then((response) => {
+      if (!response.ok) throw new Error(`Upload of ${file.name} failed`);
+      return upload.token;
+    });
+  }
+
+  form.addEventListener("submit", function (e) {
+    const files = Array.from(fileInput ? fileInput.files : []);
+    if (files.length === 0 || form.dataset.directUpload === "done") return;
+
+    e.preventDefault();
+    const button = form.querySelector('button[type="submit"]');
+    button.disabled = true;
+
+    fetch(form.dataset.presignUrl, {
+      method: "POST",
+      headers: { "Content-Type": "application/json" },
+      body: JSON.stringify({
+        files: files.map((file) => ({ name: file.name, type: file.type, size: file.size })),
+      }),
+    })
+      .then((response) => {
+        if (!response.ok) throw new Error("Could not prepare uploads");
+        return response.json();
+      })
+      .then((result) => {
+        if (Object.keys(result.errors).length > 0) {
+          throw new Error(Object.entries(result.errors).map(([name, error]) => `${name}: ${error}`).join("\n"));
+        }
+        const byName = new Map(result.uploads.map((upload) => [upload.name, upload]));
+        return Promise.all(files.map((file) => uploadToBucket(byName.get(file.name), file)));
+      })
+      .then((tokens) => {
+        tokens.forEach((token) => {
+          const input = document.createElement("input");
+          input.type = "hidden";
+          input.name = "uploaded_files";
+          input.value = token;
+          form.appendChild(input);
+        });
+        fileInput.value = "";
+        form.dataset.directUpload = "done";
+        form.submit();
+      })
+      .catch((error) => {
+        console.error(error);
+        form.dataset.directUpload = "done";
+        form.submit();
+      });
+  });
+});
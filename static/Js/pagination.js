@@ -0,0 +1,71 @@
+document.addEventListener("DOMContentLoaded", function () {
+  const escape = (value) =>
+    String(value ?? "").replace(/[&<>"']/g, (c) => `&#${c.charCodeAt(0)};`);
+
+  const renderers = {
+    clients: (client) => `
+      <tr>
+        <td><b>${escape(client.unique_id)}</b></td>
+        <td>
+          <a href="${escape(client.url)}">
+            ${escape(client.name)}
+            <i class="fas fa-arrow-up-right-from-square"></i>
+          </a>
+        </td>
+        <td>${escape(client.phone)}</td>
+        <td>${escape(client.email)}</td>
+        <td></td>
+      </tr>
+    `,
+    cases: (item) => `
+      <tr>
+        <td>
+          <a href="${escape(item.url)}">
+            <b>${escape(item.alias)}</b>
+            <i class="fas fa-arrow-up-right-from-square"></i>
+          </a>
+        </td>
+        <td>
+          <a href="${escape(item.client_url)}">
+            ${escape(item.client_name)}
+            <i class="fas fa-arrow-up-right-from-square"></i>
+          </a>
+        </td>
+        <td>${escape(item.opened_date)}</td>
+        <td>${item.status === "closed" ? escape(item.closed_date) : "----"}</td>
+        <td>
+          ${
+            item.status === "closed"
+              ? '<span class="status-badge cancelled">Closed</span>'
+              : '<span class="status-badge completed">Open</span>'
+          }
+        </td>
+      </tr>
+    `,
+  };
+
+  document.querySelectorAll(".load-more").forEach((button) => {
+    button.addEventListener("click", function () {
+      const cursor = button.getAttribute("data-cursor");
+      const render = renderers[button.getAttribute("data-tab")];
+      const rows = document.getElementById(button.getAttribute("data-target"));
+
+      button.disabled = true;
+      fetch(`${button.getAttribute("data-endpoint")}?cursor=${encodeURIComponent(cursor)}`)
+        .then((response) => response.json())
+        .then((page) => {
+          rows.insertAdjacentHTML("beforeend", page.items.map(render).join(""));
+
+          if (page.next_cursor) {
+            button.setAttribute("data-cursor", page.next_cursor);
+            button.disabled = false;
+          } else {
+            button.remove();
+          }
+        })
+        .catch(() => {
+          button.disabled = false;
+        });
+    });
+  });
+});